@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+"""
+Benchmarks the rule pack against the template fixtures.
+
+Modes:
+  corpus   lint every template with cfn-lint and the rule pack, the same way
+           wrapped-cfn-lint does
+  rules    run each rule pack rule alone against every decoded template;
+           decoding and building the Template are not timed
+  startup  lint a few templates in a fresh wrapped-cfn-lint process (cold)
+           and again in a process that has already loaded the rules (warm)
+
+Each mode runs in a fresh interpreter, so its peak RSS is its own. Results
+are written as JSON, and can be compared against a baseline from an
+earlier run; any metric that regressed by more than --threshold fails the
+run.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_TEMPLATES_DIR = os.path.join(
+    REPO_ROOT, "test", "fixtures", "templates"
+)
+TEMPLATE_EXTENSIONS = (".template", ".yaml", ".yml", ".json")
+MODES = ["corpus", "rules", "startup"]
+LATENCY_FIELDS = ["p50_ms", "p95_ms", "p99_ms"]
+
+
+def find_templates(templates_dir, sample=0):
+    """Templates under templates_dir, or sample of them, evenly spaced"""
+    templates = []
+    for root, dirs, files in os.walk(templates_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.join(root, name)
+                templates.append(os.path.relpath(path, REPO_ROOT))
+    if sample:
+        templates = evenly_spaced(templates, sample)
+    return templates
+
+
+def evenly_spaced(items, count):
+    if count >= len(items):
+        return items
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(who).ru_maxrss / scale, 1)
+
+
+def summarize(latencies, rss_mb):
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "templates": len(latencies),
+        "total_time": round(total, 4),
+        "templates_per_second": round(len(latencies) / total, 2)
+        if total
+        else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "peak_rss_mb": rss_mb,
+    }
+
+
+def _lint_args():
+    import cfnlint.config
+    from cfn_mp_ql_rules import cfnlint_exit_code_wrapper
+
+    rule_location = os.path.dirname(
+        os.path.abspath(cfnlint_exit_code_wrapper.__file__)
+    )
+    args = cfnlint.config.ConfigMixIn([f"-a={rule_location}"])
+    return args, rule_location
+
+
+def _time_lint(filename, args):
+    from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import lint_file
+
+    start = time.perf_counter()
+    lint_file(filename, args)
+    return time.perf_counter() - start
+
+
+def bench_corpus(templates, options):
+    from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import get_rules
+
+    args, _ = _lint_args()
+    get_rules(args)
+    latencies = [_time_lint(filename, args) for filename in templates]
+    return summarize(latencies, peak_rss_mb())
+
+
+def bench_rules(templates, options):
+    import cfnlint.decode
+    import cfnlint.template
+    from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import get_rules
+    from cfn_mp_ql_rules.rule_timings import defined_under
+
+    args, rule_location = _lint_args()
+    rules = get_rules(args)
+    pack_rules = [
+        rule
+        for rule in rules.all_rules.values()
+        if defined_under(getattr(rule, "match", None), rule_location)
+        and (not options.rules or rule.id in options.rules)
+    ]
+    latencies = {rule.id: [] for rule in pack_rules}
+    for filename in templates:
+        (template, errors) = cfnlint.decode.decode(filename)
+        if errors or not template:
+            continue
+        for rule in pack_rules:
+            cfn = cfnlint.template.Template(filename, template, args.regions)
+            start = time.perf_counter()
+            rule.initialize(cfn)
+            rules.run_check(rule.matchall, filename, rule.id, filename, cfn)
+            latencies[rule.id].append(time.perf_counter() - start)
+    rss_mb = peak_rss_mb()
+    return {
+        rule_id: summarize(rule_latencies, rss_mb)
+        for rule_id, rule_latencies in sorted(latencies.items())
+    }
+
+
+def bench_startup(templates, options):
+    templates = evenly_spaced(templates, options.startup_templates)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [REPO_ROOT] + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    command = [
+        sys.executable,
+        "-c",
+        "from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import main; main()",
+    ]
+    cold = []
+    for filename in templates:
+        for _ in range(options.repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                command + [filename],
+                cwd=REPO_ROOT,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+            cold.append(time.perf_counter() - start)
+    cold_rss = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import get_rules
+
+    args, _ = _lint_args()
+    get_rules(args)
+    _time_lint(templates[0], args)
+    warm = [
+        _time_lint(filename, args)
+        for filename in templates
+        for _ in range(options.repeat)
+    ]
+    return {
+        "cold": summarize(cold, cold_rss),
+        "warm": summarize(warm, peak_rss_mb()),
+    }
+
+
+BENCHMARKS = {
+    "corpus": bench_corpus,
+    "rules": bench_rules,
+    "startup": bench_startup,
+}
+
+
+def _run_mode(mode, templates, options):
+    os.chdir(REPO_ROOT)
+    # some rules print while linting; keep that out of the harness output
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BENCHMARKS[mode](templates, options)
+
+
+def run_benchmarks(templates, options):
+    import cfnlint.version
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for mode in options.modes:
+        with context.Pool(1) as pool:
+            results[mode] = pool.apply(_run_mode, (mode, templates, options))
+    return {
+        "settings": {
+            "templates": len(templates),
+            "sample": options.sample,
+            "rules": options.rules,
+            "startup_templates": options.startup_templates,
+            "repeat": options.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "cfn_lint": cfnlint.version.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def flatten_results(report):
+    flat = {}
+    for mode, result in report["results"].items():
+        if "templates" in result:
+            flat[mode] = result
+        else:
+            for name, entry in result.items():
+                flat[f"{mode}/{name}"] = entry
+    return flat
+
+
+def compare(report, baseline, threshold, noise_floor_ms):
+    """Returns a list of regression descriptions, empty if there are none"""
+    regressions = []
+    current = flatten_results(report)
+    for name, base in flatten_results(baseline).items():
+        new = current.get(name)
+        if new is None:
+            continue
+        if new["templates_per_second"] < base["templates_per_second"] * (
+            1 - threshold
+        ):
+            regressions.append(
+                f"{name}: templates_per_second "
+                f"{base['templates_per_second']} -> {new['templates_per_second']}"
+            )
+        for field in LATENCY_FIELDS:
+            if (
+                new[field] > base[field] * (1 + threshold)
+                and new[field] - base[field] > noise_floor_ms
+            ):
+                regressions.append(
+                    f"{name}: {field} {base[field]} -> {new[field]}"
+                )
+        if new["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak_rss_mb {base['peak_rss_mb']} -> {new['peak_rss_mb']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--templates-dir", default=DEFAULT_TEMPLATES_DIR)
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=0,
+        help="benchmark this many evenly spaced templates, 0 for all",
+    )
+    parser.add_argument(
+        "--modes",
+        default=",".join(MODES),
+        type=lambda s: [m for m in s.split(",") if m],
+        help=f"comma separated modes to run (default {','.join(MODES)})",
+    )
+    parser.add_argument(
+        "--rules",
+        default=[],
+        type=lambda s: [r for r in s.split(",") if r],
+        help="comma separated rule ids for the rules mode (default all)",
+    )
+    parser.add_argument(
+        "--startup-templates",
+        type=int,
+        default=5,
+        help="number of templates linted by the startup mode",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="times each startup template is linted cold and warm",
+    )
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fail if a metric is this fraction worse than the baseline",
+    )
+    parser.add_argument(
+        "--noise-floor-ms",
+        type=float,
+        default=2.0,
+        help="ignore latency increases smaller than this",
+    )
+    options = parser.parse_args()
+    unknown = set(options.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    templates = find_templates(options.templates_dir, options.sample)
+    report = run_benchmarks(templates, options)
+    output = json.dumps(report, indent=2) + "\n"
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["settings"] != report["settings"]:
+            print(
+                "baseline was run with different settings, not comparing: "
+                f"{baseline['settings']}",
+                file=sys.stderr,
+            )
+            return 2
+        regressions = compare(
+            report, baseline, options.threshold, options.noise_floor_ms
+        )
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("no regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
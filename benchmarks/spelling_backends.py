@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Compares SentenceCase's spelling backends: pyspellchecker's SpellChecker,
+and the symmetric delete index set by CFN_MP_QL_RULES_SPELLING=symspell.
+
+Every word W9006 would spell check in the template fixtures' parameter
+descriptions, group names and labels is checked by both, once per
+occurrence, and each distinct unknown word is corrected by both. Loading
+each backend is timed separately, up to its first unknown() answer, as the
+index only decodes its word list then. Any word the two disagree is
+unknown fails the run; corrections that differ are counted, since a tie on
+frequency can go either way.
+"""
+import argparse
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from run_benchmarks import DEFAULT_TEMPLATES_DIR, find_templates  # noqa: E402
+
+
+def texts(template):
+    """the descriptions, group names and labels SentenceCase checks"""
+    from cfn_mp_ql_rules.SentenceCase import strip_urls
+
+    found = []
+    for parameter in (template.get("Parameters") or {}).values():
+        if isinstance(parameter, dict) and isinstance(
+            parameter.get("Description"), str
+        ):
+            found.append(strip_urls(parameter["Description"]))
+    metadata = template.get("Metadata")
+    interface = None
+    if isinstance(metadata, dict):
+        interface = metadata.get("AWS::CloudFormation::Interface")
+    if isinstance(interface, dict):
+        for group in interface.get("ParameterGroups") or []:
+            label = group.get("Label") if isinstance(group, dict) else None
+            if isinstance(label, dict) and isinstance(label.get("default"), str):
+                found.append(label["default"])
+        for label in (interface.get("ParameterLabels") or {}).values():
+            if isinstance(label, dict) and isinstance(label.get("default"), str):
+                found.append(label["default"])
+    return found
+
+
+def checked_words(templates):
+    """every word SentenceCase would spell check, once per template"""
+    import cfnlint.decode
+    from cfn_mp_ql_rules import spelling
+    from cfn_mp_ql_rules.SentenceCase import Base
+
+    custom_dict = spelling.custom_dict()
+    words = []
+    for filename in templates:
+        try:
+            template, errors = cfnlint.decode.decode(
+                os.path.join(REPO_ROOT, filename)
+            )
+        except Exception:  # pylint: disable=broad-except
+            continue
+        if errors or not isinstance(template, dict):
+            continue
+        exclude = (template.get("Metadata") or {}).get("SentenceCaseExclude", [])
+        template_words = set()
+        for text in texts(template):
+            template_words |= Base.get_words(text, custom_dict, exclude)[0]
+        words.extend(template_words)
+    return words
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def load(backend):
+    """the backend, ready to answer, as the first template that checks a word sees it"""
+    loaded = backend()
+    loaded.unknown(["the"])
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--templates-dir", default=DEFAULT_TEMPLATES_DIR)
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=0,
+        help="use only this many templates, evenly spaced",
+    )
+    options = parser.parse_args()
+
+    from cfn_mp_ql_rules import spelling
+
+    words = checked_words(
+        find_templates(options.templates_dir, options.sample)
+    )
+    # built outside the timings, as it is once per installed dictionary
+    spelling.index()
+    spelling.index.cache_clear()
+    spelling.spell_checker.cache_clear()
+    spell, spell_load = timed(load, spelling.spell_checker)
+    index, index_load = timed(load, spelling.index)
+
+    # one word at a time, as SentenceCase asks per distinct word and template
+    def check(backend):
+        return {w.lower() for w in words if backend.unknown([w])}
+
+    spell_unknown, spell_check = timed(check, spell)
+    index_unknown, index_check = timed(check, index)
+    disagree = sorted(spell_unknown ^ index_unknown)
+
+    unknown = sorted(spell_unknown & index_unknown)
+    spell_fixes, spell_correct = timed(
+        lambda: [spell.correction(w) for w in unknown]
+    )
+    index_fixes, index_correct = timed(
+        lambda: [index.correction(w) for w in unknown]
+    )
+    differ = sum(a != b for a, b in zip(spell_fixes, index_fixes))
+
+    n = max(len(words), 1)
+    u = max(len(unknown), 1)
+    print(
+        f"{len(words)} words checked, {len(set(w.lower() for w in words))} "
+        f"distinct, {len(unknown)} unknown\n"
+        f"{'':16}{'load':>10}{'unknown()':>22}{'correction()':>24}\n"
+        f"pyspellchecker: {spell_load:8.3f} s {spell_check:8.3f} s "
+        f"{spell_check / n * 1e6:7.1f} us each {spell_correct:8.3f} s "
+        f"{spell_correct / u * 1e3:7.2f} ms each\n"
+        f"symspell:       {index_load:8.3f} s {index_check:8.3f} s "
+        f"{index_check / n * 1e6:7.1f} us each {index_correct:8.3f} s "
+        f"{index_correct / u * 1e3:7.2f} ms each\n"
+        f"corrections: {differ} of {len(unknown)} differ"
+    )
+    if disagree:
+        print(f"unknown to one backend only: {disagree}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Compares IAMActionWildcard's wildcard expansion, iam_data.expand_action,
+with the policyuniverse path it replaced: get_actions_from_statement, which
+fnmatches every known action, followed by a canonical case lookup.
+
+Every wildcard action found in the template fixtures is expanded by both,
+once per occurrence, as the rule does. expand_action is timed twice: cold,
+with its memo cleared before each expansion, which is the cost of the
+prefix index itself, and warm, with the memo kept across occurrences, as
+the rule sees it within a process. Any pattern the two expand differently
+is reported and fails the run.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from run_benchmarks import DEFAULT_TEMPLATES_DIR, find_templates  # noqa: E402
+
+WILDCARD_ACTION = re.compile(r"\b[a-z0-9-]+:[A-Za-z0-9*?]*\*[A-Za-z0-9*?]*")
+
+
+def wildcard_actions(templates):
+    """every occurrence of a wildcard action in the templates' text"""
+    actions = []
+    for filename in templates:
+        with open(os.path.join(REPO_ROOT, filename), errors="replace") as f:
+            actions.extend(WILDCARD_ACTION.findall(f.read()))
+    return actions
+
+
+def policyuniverse_expand(pattern):
+    from cfn_mp_ql_rules import iam_data
+
+    return {
+        iam_data.canonical_action(k)
+        for k in iam_data.get_actions_from_statement({"Action": [pattern]})
+    }
+
+
+def index_expand(pattern):
+    from cfn_mp_ql_rules import iam_data
+
+    return iam_data.expand_action(pattern)
+
+
+def time_expansions(expand, actions):
+    start = time.perf_counter()
+    for action in actions:
+        expand(action)
+    return time.perf_counter() - start
+
+
+def time_cold_expansions(actions):
+    """expand_action's time with nothing memoized, summed over actions"""
+    from cfn_mp_ql_rules import iam_data
+
+    total = 0.0
+    for action in actions:
+        iam_data._expand_action.cache_clear()  # pylint: disable=protected-access
+        start = time.perf_counter()
+        iam_data.expand_action(action)
+        total += time.perf_counter() - start
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--templates-dir", default=DEFAULT_TEMPLATES_DIR)
+    options = parser.parse_args()
+
+    from cfn_mp_ql_rules import iam_data
+
+    iam_data.load_all()
+    actions = wildcard_actions(find_templates(options.templates_dir))
+    mismatches = [
+        pattern
+        for pattern in sorted(set(actions))
+        if policyuniverse_expand(pattern) != index_expand(pattern)
+    ]
+    old = time_expansions(policyuniverse_expand, actions)
+    cold = time_cold_expansions(actions)
+    iam_data._expand_action.cache_clear()  # pylint: disable=protected-access
+    warm = time_expansions(index_expand, actions)
+    n = len(actions)
+    print(
+        f"{n} wildcard actions, {len(set(actions))} distinct\n"
+        f"policyuniverse:       {old:8.3f} s  {old / n * 1e6:10.1f} us each\n"
+        f"expand_action, cold:  {cold:8.3f} s  {cold / n * 1e6:10.1f} us each"
+        f"  ({old / cold:.1f}x)\n"
+        f"expand_action, warm:  {warm:8.3f} s  {warm / n * 1e6:10.1f} us each"
+        f"  ({old / warm:.1f}x)"
+    )
+    for pattern in mismatches:
+        print(f"different expansion: {pattern}", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
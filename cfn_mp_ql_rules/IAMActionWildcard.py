@@ -18,45 +18,12 @@
 import json
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
+from cfn_mp_ql_rules import iam_data
 from cfn_mp_ql_rules.common import deep_get
-import logging
-import os
-
-# policyuniverse messes with the global logger, so need to reset loglevel after it's done.
-logger = logging.getLogger()
-orig_level = logger.level
-from policyuniverse.expander_minimizer import get_actions_from_statement
-from policyuniverse import service_data
-
-logger.setLevel(orig_level)
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "IAM policy should not allow * Actions; List each required action explicitly instead"
 DONT_EXPAND = ["s3:Get*", "s3:Put*", "s3:List*"]
-CAMEL_CASE = {}
-
-for sd in service_data.values():
-    for k in sd["actions"].keys():
-        CAMEL_CASE[f"{sd['prefix']}:{k}".lower()] = f"{sd['prefix']}:{k}"
-
-
-def determine_perms(service_data):
-    perms = {}
-    for method_name, method_data in service_data.items():
-        _r = set([k for k in method_data["resource_types"].keys() if k != ""])
-        if not _r:
-            continue
-        perms[method_name] = _r
-    return perms
-
-
-custom_dict_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)),
-    "data/granular_permissions.json",
-)
-with open(custom_dict_path) as f:
-    d = f.read()
-_gp = json.loads(d)
-GRANULAR_PERMS = determine_perms(_gp)
 
 
 def expanded(action):
@@ -75,15 +42,10 @@ def is_wild(action):
     return wild_actions
 
 
-def get_effect(template, keys: list):
-    # raise
-    k = keys.copy()
-    while len(k) > 2:
-        template = template[k.pop(0)]
-    try:
-        return template["Effect"]
-    except KeyError:
+def get_effect(statement):
+    if statement.effect is None:
         return "deny"
+    return statement.effect
 
 
 class IAMActionWildcard(CloudFormationLintRule):
@@ -122,44 +84,32 @@ class IAMActionWildcard(CloudFormationLintRule):
     def match(self, cfn):
         """Basic Matching"""
         violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            # if not isinstance(tm[-3], int):
-            #     continue
-            if get_effect(cfn.template, tm).lower() == "deny":
+        for statement in get_policy_model(cfn).with_key("Action"):
+            if get_effect(statement).lower() == "deny":
                 continue
-            if tm[-1] == "*" or ("*" in tm[-1] and isinstance(tm[-1], list)):
-                violation_matches.append(
-                    RuleMatch(tm[:-1], LINT_ERROR_MESSAGE)
-                )
-            else:
-                wild_actions = is_wild(tm[-1])
-                for wild_action in wild_actions:
-                    expanded_actions = {
-                        CAMEL_CASE.get(k, k)
-                        for k in get_actions_from_statement(
-                            {"Action": [wild_action]}
-                        )
-                    }
-                    msg = f"{LINT_ERROR_MESSAGE} matching actions for {wild_action} are: {json.dumps(list(expanded_actions))}"
-                    if isinstance(tm[-1], list):
-                        violation_matches.append(
-                            RuleMatch(
-                                tm[:-1] + [tm[-1].index(wild_action)],
-                                msg,
-                                expanded_actions=expanded_actions,
-                                expanded_on_newline=True,
-                            )
-                        )
-                    else:
-                        violation_matches.append(
-                            RuleMatch(
-                                tm[:-1],
-                                msg,
-                                expanded_actions=expanded_actions,
-                                expanded_on_newline=True,
-                            )
-                        )
+            violation_matches += self._match_actions(
+                statement.path + ["Action"], statement.action
+            )
         return violation_matches
+
+    def _match_actions(self, path, actions):
+        matches = []
+        if actions == "*" or ("*" in actions and isinstance(actions, list)):
+            matches.append(RuleMatch(path, LINT_ERROR_MESSAGE))
+            return matches
+        for wild_action in is_wild(actions):
+            expanded_actions = iam_data.expand_action(wild_action)
+            msg = f"{LINT_ERROR_MESSAGE} matching actions for {wild_action} are: {json.dumps(list(expanded_actions))}"
+            if isinstance(actions, list):
+                match_path = path + [actions.index(wild_action)]
+            else:
+                match_path = path
+            matches.append(
+                RuleMatch(
+                    match_path,
+                    msg,
+                    expanded_actions=expanded_actions,
+                    expanded_on_newline=True,
+                )
+            )
+        return matches
@@ -18,6 +18,7 @@
 import json
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
+from cfn_mp_ql_rules.common import get_template_index
 
 
 LINT_ERROR_MESSAGE = "IAM policy exclusions must provide exclusion reason eg.: {Metadata: {cfn-lint: {config: {ignore_reasons: {EIAMPolicyActionWildcard: this is the justification for the exclude}}}}"
@@ -41,8 +42,9 @@ class IAMExcludeReason(CloudFormationLintRule):
         """Basic Matching"""
         violation_matches = []
         term_matches = []
+        index = get_template_index(cfn)
         for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
+            term_matches += index.search_deep_keys(prop)
         for tm in term_matches:
             config = tm[-1]
             if "ignore_checks" not in config:
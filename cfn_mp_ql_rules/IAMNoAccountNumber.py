@@ -20,7 +20,8 @@ import json
 import os
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules.common import string_leaves
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "Hard-coded account IDs are unacceptable."
 CFN_NAG_RULES = [
@@ -29,8 +30,18 @@ CFN_NAG_RULES = [
 ]
 
 
-def determine_account_id_in_principal(resource_path, resource):
-    return re.search(r"[0-9]{12}", str(resource))
+ACCOUNT_ID = re.compile(r"[0-9]{12}")
+# the account field of an ARN, or a Fn::Join piece that is only that field
+ARN_ACCOUNT_ID = re.compile(r"(?:^|:)[0-9]{12}(?::|$)")
+
+
+def determine_account_ids(path, value, pattern=ACCOUNT_ID):
+    """paths of the string leaves under value that pattern finds an account ID in"""
+    return [
+        leaf_path
+        for leaf_path, leaf in string_leaves(value, path)
+        if pattern.search(leaf)
+    ]
 
 
 class IAMResourceWildcard(CloudFormationLintRule):
@@ -45,18 +56,31 @@ class IAMResourceWildcard(CloudFormationLintRule):
     tags = ["iam"]
     SEARCH_PROPS = ["Principal"]
 
+    def __init__(self):
+        super().__init__()
+        self.config_definition = {
+            "scan_template": {
+                "default": False,
+                "type": "boolean",
+            },
+        }
+        self.configure()
+
     def match(self, cfn):
         """Basic Matching"""
-        violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            violating_principal = determine_account_id_in_principal(
-                tm[:-1], tm[-1]
-            )
-            if violating_principal:
-                violation_matches.append(
-                    RuleMatch(tm[:-1], LINT_ERROR_MESSAGE)
+        if self.config["scan_template"]:
+            violations = determine_account_ids([], cfn.template)
+        else:
+            model = get_policy_model(cfn)
+            violations = []
+            for statement in model.with_key("Principal"):
+                violations += determine_account_ids(
+                    statement.path + ["Principal"], statement.principal
+                )
+            for statement in model.with_key("Resource"):
+                violations += determine_account_ids(
+                    statement.path + ["Resource"],
+                    statement.resource,
+                    ARN_ACCOUNT_ID,
                 )
-        return violation_matches
+        return [RuleMatch(path, LINT_ERROR_MESSAGE) for path in violations]
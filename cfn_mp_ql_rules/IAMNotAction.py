@@ -20,15 +20,14 @@ import json
 import os
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "Combining Action and NotAction is a bad idea."
 CFN_NAG_RULES = ["W14", "W15", "W16", "W17", "W18", "W19", "W20"]
 
 
-def determine_action_notaction_violation(cfn, policy_path):
-    policy = deep_get(cfn.template, policy_path, [])
-    return all(x in policy.keys() for x in ["Action", "NotAction"])
+def determine_action_notaction_violation(statement):
+    return statement.action is not None and statement.not_action is not None
 
 
 class IAMResourceWildcard(CloudFormationLintRule):
@@ -46,15 +45,12 @@ class IAMResourceWildcard(CloudFormationLintRule):
     def match(self, cfn):
         """Basic Matching"""
         violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            violating_policy = determine_action_notaction_violation(
-                cfn, tm[:-2]
-            )
+        for statement in get_policy_model(cfn).with_key("Resource"):
+            violating_policy = determine_action_notaction_violation(statement)
             if violating_policy:
                 violation_matches.append(
-                    RuleMatch(tm[:-2] + ["NotAction"], LINT_ERROR_MESSAGE)
+                    RuleMatch(
+                        statement.path + ["NotAction"], LINT_ERROR_MESSAGE
+                    )
                 )
         return violation_matches
@@ -0,0 +1,102 @@
+"""
+  Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+  Permission is hereby granted, free of charge, to any person obtaining a copy of this
+  software and associated documentation files (the "Software"), to deal in the Software
+  without restriction, including without limitation the rights to use, copy, modify,
+  merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+  permit persons to whom the Software is furnished to do so.
+
+  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+  INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+  PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+  HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+  OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+  SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from cfnlint.rules import CloudFormationLintRule
+from cfnlint.rules import RuleMatch
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.effective_permissions import breadth, statement_bits
+from cfn_mp_ql_rules.iam_policy import get_policy_model
+
+NOT_ACTION_MESSAGE = "NotAction statement {} of {} by breadth: Allow with NotAction grants {} actions across {} services, {} of them entirely; broadest: {}"
+NOT_RESOURCE_MESSAGE = "NotResource statement {} of {} by breadth: Allow with NotResource leaves {} resource types open to {} actions: {}"
+TOP_SERVICES = 5
+TOP_RESOURCE_TYPES = 5
+
+
+def _ranked(findings, message):
+    # cfn-lint reports matches in line order, so the rank goes in the message
+    findings.sort(key=lambda f: f[0], reverse=True)
+    return [
+        RuleMatch(path, message.format(rank, len(findings), *values), **kw)
+        for rank, (_, path, values, kw) in enumerate(findings, 1)
+    ]
+
+
+class IAMNotBreadth(CloudFormationLintRule):
+    """Report how much Allow statements with NotAction or NotResource grant."""
+
+    id = "WIAMPolicyNotElementBreadth"
+    experimental = True
+    shortdesc = "Allow statements with NotAction or NotResource grant broadly"
+    description = (
+        "Reporting the actions and services each Allow statement with "
+        "NotAction grants, and the resource types each Allow statement with "
+        "NotResource leaves open, ranked by breadth"
+    )
+    source_url = (
+        "https://github.com/aws-ia/cfn-mp-ql-rules/cfn_mp_ql_rules"
+    )
+    tags = ["iam"]
+
+    def match(self, cfn):
+        """Basic Matching"""
+        model = get_policy_model(cfn)
+        not_action = []
+        for statement in model.with_key("NotAction"):
+            if statement.effect != "Allow" or statement.action is not None:
+                continue
+            actions, services, entire, broadest = breadth(
+                statement_bits(statement), TOP_SERVICES
+            )
+            top = ", ".join(
+                f"{service} ({count})" for service, count in broadest
+            )
+            not_action.append(
+                (
+                    actions,
+                    statement.path + ["NotAction"],
+                    (actions, services, entire, top or "none"),
+                    {"allowed_actions": actions, "allowed_services": services},
+                )
+            )
+        not_resource = []
+        for statement in model.with_key("NotResource"):
+            if statement.effect != "Allow":
+                continue
+            # EIAMPolicyActionNotResource already reports these
+            if statement.resource is not None and statement.action is not None:
+                continue
+            bits = statement_bits(statement)
+            open_types = sorted(iam_data.open_resource_types(bits))
+            if len(open_types) > TOP_RESOURCE_TYPES:
+                listed = ", ".join(open_types[:TOP_RESOURCE_TYPES]) + ", ..."
+            else:
+                listed = ", ".join(open_types) or "none"
+            actions = iam_data.action_count(bits)
+            not_resource.append(
+                (
+                    (len(open_types), actions),
+                    statement.path + ["NotResource"],
+                    (len(open_types), actions, listed),
+                    {
+                        "allowed_actions": actions,
+                        "open_resource_types": len(open_types),
+                    },
+                )
+            )
+        return _ranked(not_action, NOT_ACTION_MESSAGE) + _ranked(
+            not_resource, NOT_RESOURCE_MESSAGE
+        )
@@ -20,7 +20,7 @@ import json
 import os
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "Combining Action and NotResource is a bad idea."
 CFN_NAG_RULES = [
@@ -29,9 +29,8 @@ CFN_NAG_RULES = [
 ]
 
 
-def determine_action_notaction_violation(cfn, policy_path):
-    policy = deep_get(cfn.template, policy_path, [])
-    return all(x in policy.keys() for x in ["Action", "NotResource"])
+def determine_action_notaction_violation(statement):
+    return statement.action is not None and statement.not_resource is not None
 
 
 class IAMResourceWildcard(CloudFormationLintRule):
@@ -49,15 +48,12 @@ class IAMResourceWildcard(CloudFormationLintRule):
     def match(self, cfn):
         """Basic Matching"""
         violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            violating_policy = determine_action_notaction_violation(
-                cfn, tm[:-2]
-            )
+        for statement in get_policy_model(cfn).with_key("Resource"):
+            violating_policy = determine_action_notaction_violation(statement)
             if violating_policy:
                 violation_matches.append(
-                    RuleMatch(tm[:-2] + ["NotResource"], LINT_ERROR_MESSAGE)
+                    RuleMatch(
+                        statement.path + ["NotResource"], LINT_ERROR_MESSAGE
+                    )
                 )
         return violation_matches
@@ -15,70 +15,46 @@
   SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import re
-import six
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules.common import deep_get, get_template_index
+from cfn_mp_ql_rules.iam_policy import STATEMENT_KEYS, get_policy_model
 
 LINT_ERROR_MESSAGE = (
     "ARNs must be partition-agnostic. Please leverage ${AWS::Partition}"
 )
 
 
-def verify_agnostic_partition(cfn, resource_path, arndata):
-    def _not_partition_agnostic_str(arnstr):
-        if re.search("^arn:aws(-*)?", arnstr):
-            return True
+ARN_PARTITION = re.compile(r"arn:aws(?:-[a-z]+)*:")
+AGNOSTIC_PARTITION = "arn:${AWS::Partition}:"
 
-    def _not_partition_agnostic_list(resource_path, arnlist):
-        matches = []
-        for idx, subitem in enumerate(arnlist):
-            if isinstance(subitem, six.string_types):
-                if _not_partition_agnostic_str(subitem):
-                    matches.append(resource_path + [idx])
-            elif isinstance(subitem, dict):
-                matches += _not_partition_agnostic_dict(
-                    resource_path + [idx], subitem
-                )
-            elif isinstance(subitem, list):
-                matches += _not_partition_agnostic_list(
-                    resource_path + [idx], subitem
-                )
-        return matches
 
-    def _not_partition_agnostic_dict(resource_path, subitem):
-        matches = []
-        for key, value in subitem.items():
-            if not key == "Fn::Sub":
-                return []
-            if isinstance(value, list):
-                if len(value) == 2:
-                    sub_str = value[0]
-                    params = value[1]
-                    if _not_partition_agnostic_str(sub_str):
-                        matches.append(resource_path + [key, 0])
-            elif isinstance(value, six.string_types):
-                if _not_partition_agnostic_str(value):
-                    matches.append(resource_path)
-        return matches
+def hard_coded_partitions(path, value):
+    """
+    Lazily yields the path of each string under value, which sits at path,
+    that starts with an ARN naming its partition. Intrinsic functions are
+    descended into like any other mapping.
+    """
+    stack = [(path, value)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, str):
+            if ARN_PARTITION.match(value):
+                yield path
+        elif isinstance(value, dict):
+            items = list(value.items())
+            for key, item in reversed(items):
+                stack.append((path + [key], item))
+        elif isinstance(value, list):
+            for idx in range(len(value) - 1, -1, -1):
+                stack.append((path + [idx], value[idx]))
+
 
-    matches = []
-    if isinstance(arndata, six.string_types):
-        if _not_partition_agnostic_str(arndata):
-            matches.append(RuleMatch(resource_path, LINT_ERROR_MESSAGE))
-    elif hasattr(arndata, "update"):
-        _t = arndata.copy()
-        if isinstance(_t, dict):
-            lm = _not_partition_agnostic_dict(resource_path, arndata)
-            for rp in lm:
-                matches.append(RuleMatch(rp, LINT_ERROR_MESSAGE))
-    elif hasattr(arndata, "copy"):
-        _t = arndata.copy()
-        if isinstance(arndata, list):
-            lm = _not_partition_agnostic_list(resource_path, _t)
-            for rp in lm:
-                matches.append(RuleMatch(rp, LINT_ERROR_MESSAGE))
-    return matches
+def in_sub_string(path):
+    """True if path is the string of a Fn::Sub, in either of its forms"""
+    if path[-1] == "Fn::Sub":
+        return True
+    return path[-1] == 0 and len(path) > 1 and path[-2] == "Fn::Sub"
 
 
 class IAMPartition(CloudFormationLintRule):
@@ -93,34 +69,24 @@ class IAMPartition(CloudFormationLintRule):
     tags = ["iam"]
     SEARCH_PROPS = ["Resource", "ManagedPolicyArns"]
 
+    def __init__(self):
+        super().__init__()
+        self.config_definition = {
+            "arn_properties": {
+                "default": [],
+                "type": "list",
+                "itemtype": "string",
+            },
+        }
+        self.configure()
+
     def determine_changes(self, cfn):
         substitutions = []
-
-        def _needs_sub(path, data):
-            if isinstance(data, dict) or issubclass(type(data), dict):
-                if "Fn::Sub" in data.keys():
-                    return False
-            if isinstance(path[-1], six.string_types):
-                if path[-1] == "Fn::Sub":
-                    return False
-                return True
-            if isinstance(path[-1], int):
-                if path[-2] == "Fn::Sub":
-                    return False
-                return True
-
         for match in self.match(cfn):
             _v = deep_get(cfn.template, match.path)
-            if isinstance(_v, six.string_types):
-                _nv = re.sub("arn:aws(-*)?", "arn:${AWS::Partition}", _v)
-            if isinstance(_v, dict):
-                _nv = {}
-                for k, v in _v.items():
-                    _nv[k] = re.sub("arn:aws(-*)?", "arn:${AWS::Partition}", v)
-            if _needs_sub(match.path, _v):
-                value = {"Fn::Sub": _nv}
-            else:
-                value = _nv
+            value = ARN_PARTITION.sub(AGNOSTIC_PARTITION, _v)
+            if not in_sub_string(match.path):
+                value = {"Fn::Sub": value}
             substitutions.append((match.path, _v, value))
         return substitutions
 
@@ -128,9 +94,21 @@ class IAMPartition(CloudFormationLintRule):
         """Basic Matching"""
         matches = []
         search_terms = []
-        for prop in self.SEARCH_PROPS:
-            search_terms += cfn.search_deep_keys(prop)
+        model = get_policy_model(cfn)
+        index = get_template_index(cfn)
+        props = self.SEARCH_PROPS + self.config["arn_properties"]
+        for prop in dict.fromkeys(props):
+            if prop in STATEMENT_KEYS:
+                search_terms += [
+                    (statement.path + [prop], statement.node[prop])
+                    for statement in model.with_key(prop)
+                ]
+            else:
+                search_terms += [
+                    (st[:-1], st[-1]) for st in index.search_deep_keys(prop)
+                ]
 
-        for st in search_terms:
-            matches += verify_agnostic_partition(cfn, st[:-1], st[-1])
+        for path, value in search_terms:
+            for leaf_path in hard_coded_partitions(path, value):
+                matches.append(RuleMatch(leaf_path, LINT_ERROR_MESSAGE))
         return matches
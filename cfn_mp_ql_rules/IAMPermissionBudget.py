@@ -0,0 +1,64 @@
+"""
+  Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+  Permission is hereby granted, free of charge, to any person obtaining a copy of this
+  software and associated documentation files (the "Software"), to deal in the Software
+  without restriction, including without limitation the rights to use, copy, modify,
+  merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+  permit persons to whom the Software is furnished to do so.
+
+  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+  INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+  PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+  HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+  OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+  SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+from cfnlint.rules import CloudFormationLintRule
+from cfnlint.rules import RuleMatch
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.effective_permissions import get_effective_permissions
+
+LINT_ERROR_MESSAGE = "{} is allowed {} actions, more than the budget of {}; grant only the actions it needs"
+
+
+class IAMPermissionBudget(CloudFormationLintRule):
+    """Check the number of actions each IAM principal is allowed."""
+
+    id = "WIAMPrincipalPermissionBudget"
+    experimental = True
+    shortdesc = "IAM principals should be allowed a bounded set of actions"
+    description = (
+        "Making sure no role, user or group is allowed more actions, across "
+        "its inline and attached policies with wildcards expanded, than the "
+        "configured budget"
+    )
+    source_url = (
+        "https://github.com/aws-ia/cfn-mp-ql-rules/cfn_mp_ql_rules"
+    )
+    tags = ["iam"]
+
+    def __init__(self):
+        super().__init__()
+        self.config_definition = {
+            "max_actions": {
+                "default": 1000,
+                "type": "integer",
+            },
+        }
+        self.configure()
+
+    def match(self, cfn):
+        """Basic Matching"""
+        matches = []
+        budget = self.config["max_actions"]
+        for principal, bits in get_effective_permissions(cfn).items():
+            count = iam_data.action_count(bits)
+            if count > budget:
+                matches.append(
+                    RuleMatch(
+                        ["Resources", principal],
+                        LINT_ERROR_MESSAGE.format(principal, count, budget),
+                    )
+                )
+        return matches
@@ -16,65 +16,61 @@
 """
 import re
 import six
-import json
-import os
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "IAM policy should not allow * resource; This method in this in this policy support granular permissions"
 
-custom_dict_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "data/iam_methods.json"
-)
-with open(custom_dict_path) as f:
-    d = f.read()
-resource_only = json.loads(d)
-
 
 def determine_perms():
-    custom_dict_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "data/granular_permissions.json",
-    )
-    with open(custom_dict_path) as f:
-        _gp = json.load(f)
-    perms = {}
-    for method_name, method_data in _gp.items():
-        _r = set(
-            [
-                f"{method_name.split(':')[0]}/{k}"
-                for k in method_data["resource_types"].keys()
-                if k != ""
-            ]
-        )
-        if not _r:
-            continue
-        perms[method_name] = _r
-    return perms
-
-
-def determine_wildcard_resource_violations(cfn, policy_path):
+    return iam_data.resource_type_index()[0]
+
+
+def group_by_resource_type(actions):
+    """
+    Splits actions into [(resource type, [actions])]. Each action goes to
+    the resource type the fewest of the given actions support; actions that
+    support no resource type are left out.
+    """
+    action_types, type_actions = iam_data.resource_type_index()
+    wanted = set(actions)
+    resource_types = set()
+    for action in wanted:
+        resource_types.update(action_types.get(action, ()))
+    supported = {rt: type_actions[rt] & wanted for rt in resource_types}
+    groups = []
+    assigned = set()
+    for rt in sorted(supported, key=lambda k: (len(supported[k]), k)):
+        group = sorted(supported[rt] - assigned)
+        if group:
+            groups.append((rt, group))
+            assigned.update(group)
+    return groups
+
+
+def determine_wildcard_resource_violations(statement):
     def _determine_if_safe(iam_method):
         if iam_method.endswith("*"):
             return True
-        return resource_only.get(iam_method, False)
+        return iam_data.is_resource_only(iam_method)
 
     violating_methods = []
-    policy = deep_get(cfn.template, policy_path, [])
+    policy_path = statement.path
 
-    if policy["Effect"] == "Deny":
+    if statement.effect == "Deny":
         return violating_methods
 
-    if policy.get("Condition"):
+    if statement.condition:
         return violating_methods
 
-    if isinstance(policy["Action"], six.string_types):
-        if not _determine_if_safe(policy["Action"]):
+    if isinstance(statement.action, six.string_types):
+        if not _determine_if_safe(statement.action):
             violating_methods.append(policy_path + ["Action"])
 
-    if isinstance(policy["Action"], list):
-        for idx, iam_method in enumerate(policy["Action"]):
+    if isinstance(statement.action, list):
+        for idx, iam_method in enumerate(statement.action):
             if isinstance(iam_method, list):
                 for idxx, ia in enumerate(iam_method):
                     if not _determine_if_safe(ia):
@@ -99,75 +95,64 @@ class IAMResourceWildcard(CloudFormationLintRule):
     SEARCH_PROPS = ["Resource"]
 
     def determine_changes(self, cfn):
-        PERMS = determine_perms()
         subs = []
-        # raise
-        _policy_paths = []
+        model = get_policy_model(cfn)
+        _statements = {}
         for match in self.match(cfn):
-            if match.policy_path in _policy_paths:
-                continue
-            _policy_paths.append(match.policy_path)
-        for _ppath in _policy_paths:
-            m2a = {}
-            _new_policies = []
-            policy = deep_get(cfn.template, _ppath, [])
-            # raise
-            for a in policy["Action"]:
-                if isinstance(a, list) and (len(a) == 1):
-                    a = a[0]
-                if PERMS.get(a):
-                    for m in PERMS[a]:
-                        if m2a.get(m):
-                            m2a[m].add(a)
-                        else:
-                            m2a[m] = {a}
-            ignore = []
+            _statements.setdefault(
+                tuple(match.policy_path),
+                model.statement_at(match.policy_path),
+            )
+        for statement in _statements.values():
+            _ppath = statement.path
+            policy = statement.node
             mod_policy = []
-            for _p1 in policy["Action"]:
-                if isinstance(_p1, list):
-                    for _p2 in _p1:
-                        mod_policy.append(_p2)
-                else:
-                    mod_policy.append(_p1)
-            for rn in sorted(m2a, key=lambda k: len(m2a[k])):
-                _al = [k for k in m2a[rn] if k not in ignore]
-                if _al:
-                    _new_policies.append(
-                        {
-                            "Effect": "Allow",
-                            "Action": _al,
-                            "Resource": {"Fn::Ref": rn},
-                        }
-                    )
-                ignore += _al
+            if isinstance(statement.action, list):
+                for _p1 in statement.action:
+                    if isinstance(_p1, list):
+                        mod_policy.extend(_p1)
+                    else:
+                        mod_policy.append(_p1)
+            positions = {}
+            for idx, a in enumerate(mod_policy):
+                if isinstance(a, str):
+                    positions.setdefault(a, idx)
+            groups = group_by_resource_type(positions)
+            _new_policies = [
+                {
+                    "Effect": "Allow",
+                    "Action": _al,
+                    "Resource": {"Fn::Ref": rn},
+                }
+                for rn, _al in groups
+            ]
             subs.append(
                 (_ppath, policy, _new_policies, {"append_after": True})
             )
-            for a in ignore:
-                subs.append(
-                    RuleMatch(
-                        _ppath + ["Action", mod_policy.index(a)],
-                        "WHATEVER",
-                        delete_lines=True,
+            for _, _al in groups:
+                for a in _al:
+                    subs.append(
+                        RuleMatch(
+                            _ppath + ["Action", positions[a]],
+                            "WHATEVER",
+                            delete_lines=True,
+                        )
                     )
-                )
-        # raise
         return subs
 
     def match(self, cfn):
         """Basic Matching"""
         violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            if tm[-1] not in ["*", ["*"]]:
+        for statement in get_policy_model(cfn).with_key("Resource"):
+            if statement.resource not in ["*", ["*"]]:
                 continue
             violating_methods = determine_wildcard_resource_violations(
-                cfn, tm[:-2]
+                statement
             )
             for ln in violating_methods:
                 violation_matches.append(
-                    RuleMatch(ln, LINT_ERROR_MESSAGE, policy_path=tm[:-2])
+                    RuleMatch(
+                        ln, LINT_ERROR_MESSAGE, policy_path=statement.path
+                    )
                 )
         return violation_matches
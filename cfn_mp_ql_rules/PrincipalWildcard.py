@@ -20,20 +20,19 @@ import json
 import os
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from cfn_mp_ql_rules.common import deep_get
+from cfn_mp_ql_rules.iam_policy import get_policy_model
 
 LINT_ERROR_MESSAGE = "Policy should not allow * Principal"
 
 CFN_NAG_RULES = ["F16", "F18", "F20", "F21"]
 
 
-def determine_wildcard_Principal_violations(cfn, policy_path):
+def determine_wildcard_Principal_violations(statement):
     violating_methods = []
-    policy = deep_get(cfn.template, policy_path, [])
 
-    if policy["Effect"] == "Deny":
+    if statement.effect == "Deny":
         return violating_methods
-    violating_methods.append(policy_path + ["Principal"])
+    violating_methods.append(statement.path + ["Principal"])
     return violating_methods
 
 
@@ -51,14 +50,11 @@ class IAMPrincipalWildcard(CloudFormationLintRule):
     def match(self, cfn):
         """Basic Matching"""
         violation_matches = []
-        term_matches = []
-        for prop in self.SEARCH_PROPS:
-            term_matches += cfn.search_deep_keys(prop)
-        for tm in term_matches:
-            if tm[-1] not in ["*", ["*"]]:
+        for statement in get_policy_model(cfn).with_key("Principal"):
+            if statement.principal not in ["*", ["*"]]:
                 continue
             violating_methods = determine_wildcard_Principal_violations(
-                cfn, tm[:-2]
+                statement
             )
             for ln in violating_methods:
                 violation_matches.append(RuleMatch(ln, LINT_ERROR_MESSAGE))
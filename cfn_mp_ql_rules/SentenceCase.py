@@ -16,14 +16,12 @@
 """
 from cfnlint.rules import CloudFormationLintRule
 from cfnlint.rules import RuleMatch
-from spellchecker import SpellChecker
+from cfn_mp_ql_rules import spelling
+import functools
 import re
-import os
 
 
-custom_dict_path = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "data/custom_dict.txt"
-)
+custom_dict_path = spelling.CUSTOM_DICT_FILE
 
 
 def strip_urls(s):
@@ -33,6 +31,34 @@ def strip_urls(s):
     return s
 
 
+@functools.lru_cache(maxsize=32)
+def proper_noun_matcher(words, ignore_case=False):
+    """
+    One regex matching any of words where it stands as a whole word, longest
+    first, so a description is stripped of all of them in a single pass
+    """
+    alternation = "|".join(
+        re.escape(w) for w in sorted(words, key=lambda w: (-len(w), w))
+    )
+    return re.compile(
+        r"\b(?:" + alternation + r")\b", re.IGNORECASE if ignore_case else 0
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _longest(words):
+    return max((len(w) for w in words), default=0)
+
+
+def count_leading(sentence, words):
+    """number of words in the frozenset words that sentence starts with"""
+    return sum(
+        1
+        for end in range(min(len(sentence), _longest(words)) + 1)
+        if sentence[:end] in words
+    )
+
+
 class Base(CloudFormationLintRule):
     """Check Parameter descriptions and labels are sentence case"""
 
@@ -44,12 +70,14 @@ class Base(CloudFormationLintRule):
 
     @staticmethod
     def get_custom_dict(filepath=custom_dict_path):
-        with open(filepath, "r") as f:
-            wordlist = [l.replace("\n", "") for l in f.readlines()]
-        return set(wordlist)
+        return spelling.read_custom_dict(filepath)
 
     @staticmethod
-    def get_errors(description, spell, custom_dict, sentence_case_exclude):
+    def get_words(description, custom_dict, sentence_case_exclude):
+        """
+        Words of description to spell check, and the words that break sentence
+        case, before any spelling verdicts are applied
+        """
         dict_words = set([])
         title_errors = set([])
         # [OPTIONAL] prefix should not be considered as part of the string, as it is stripped from
@@ -60,15 +88,14 @@ class Base(CloudFormationLintRule):
         # Remove example ARNs
         description = re.sub(r"\barn:\S+\b", "", description)
         # Remove items from the custom dictionary or the sentence case exclusions from the string
-        for pn in custom_dict.union(sentence_case_exclude):
-            description = re.sub(r"\b" + re.escape(pn) + r"\b", "", description)
+        custom_dict = frozenset(custom_dict)
+        excluded = custom_dict.union(sentence_case_exclude)
+        description = proper_noun_matcher(excluded).sub("", description)
+        ignore_case = proper_noun_matcher(custom_dict, ignore_case=True)
         for sentence in description.split("."):
-            word_no = 0
-            for pn in custom_dict:
-                # if sentence starts with a proper noun then we don't need to check for sentence case
-                if sentence.startswith(pn):
-                    word_no += 1
-                sentence = re.sub(r"\b" + re.escape(pn) + r"\b", "", sentence, flags=re.IGNORECASE)
+            # if sentence starts with a proper noun then we don't need to check for sentence case
+            word_no = count_leading(sentence, custom_dict)
+            sentence = ignore_case.sub("", sentence)
             if len(sentence.strip()) > 1:
                 # Check that first letter of first word is UPPER
                 if sentence[0].upper() != sentence[0]:
@@ -85,16 +112,66 @@ class Base(CloudFormationLintRule):
                                 if word[0].isupper():
                                     title_errors.add(word)
                             word_no += 1
-        spell_errors = spell.unknown(list(dict_words))
+        return dict_words, title_errors
+
+    @staticmethod
+    def apply_verdicts(dict_words, title_errors, unknown):
+        """
+        spelling and sentence case errors for the words from get_words, given
+        the lower case unknown words of a lookup that included dict_words
+        """
+        spell_errors = {w.lower() for w in dict_words} & unknown
+        title_errors = set(title_errors)
         for s in list(title_errors):
             if s.lower() in spell_errors:
                 title_errors.remove(s)
                 spell_errors.remove(s.lower())
         return spell_errors, title_errors
 
+    @classmethod
+    def get_errors(cls, description, spell, custom_dict, sentence_case_exclude):
+        dict_words, title_errors = cls.get_words(
+            description, custom_dict, sentence_case_exclude
+        )
+        unknown = spell.unknown(list(dict_words))
+        return cls.apply_verdicts(dict_words, title_errors, unknown)
+
+    def check_all(self, matches, checks, spell, custom_dict, sentence_case_exclude):
+        """
+        matches, with the errors of every check inserted where it was made.
+        Each check is (index into matches, location, description, title
+        message, spell message), the messages being called with the errors.
+        All descriptions are spell checked in one deduplicated lookup.
+        """
+        words = {
+            description: self.get_words(
+                description, custom_dict, sentence_case_exclude
+            )
+            for description in {check[2] for check in checks}
+        }
+        unknown = spell.unknown(
+            set().union(*(dict_words for dict_words, _ in words.values()))
+        )
+        checked = []
+        start = 0
+        for index, location, description, title_message, spell_message in checks:
+            checked.extend(matches[start:index])
+            start = index
+            spell_errors, title_errors = self.apply_verdicts(
+                *words[description], unknown
+            )
+            if title_errors:
+                checked.append(RuleMatch(location, title_message(title_errors)))
+            if spell_errors:
+                checked.append(RuleMatch(location, spell_message(spell_errors)))
+        checked.extend(matches[start:])
+        return checked
+
     def match(self, cfn):
         """Basic Matching"""
         matches = []
+        # (index into matches, location, description, title message, spell message)
+        checks = []
         title_message = "Parameter {0} Description is not sentence case: {1}"
         spell_message = "Parameter {0} contains spelling error(s): {1}"
         stop_message = 'Parameter {0} must end in a full stop "."'
@@ -110,15 +187,14 @@ class Base(CloudFormationLintRule):
         if "Parameters" not in cfn.template.keys():
             return matches
         else:
-            custom_dict = self.get_custom_dict()
             sentence_case_exclude = cfn.template.get("Metadata", {}).get("SentenceCaseExclude", [])
-            spell = SpellChecker()
-            if "Metadata" in cfn.template.keys():
-                if "LintSpellExclude" in cfn.template["Metadata"].keys():
-                    # add any proper nouns defined in template metadata
-                    custom_dict = custom_dict.union(
-                        set(cfn.template["Metadata"]["LintSpellExclude"])
-                    )
+            # pyspellchecker only sees words no template has checked yet
+            spell = spelling.verdicts()
+            # add any proper nouns defined in template metadata, without
+            # changing the dictionary shared with other templates
+            custom_dict = spelling.proper_nouns(
+                cfn.template.get("Metadata", {}).get("LintSpellExclude", [])
+            )
             for x in cfn.template["Parameters"]:
                 if "Description" in cfn.template["Parameters"][x].keys():
                     location = ["Parameters", x, "Description"]
@@ -128,25 +204,19 @@ class Base(CloudFormationLintRule):
                         or description.strip()[-2:] == '."'
                     )
                     description = strip_urls(description)
-                    spell_errors, title_errors = self.get_errors(
-                        description, spell, custom_dict, sentence_case_exclude,
-                    )
                     if stop_error:
                         matches.append(
                             RuleMatch(location, stop_message.format(x))
                         )
-                    if title_errors:
-                        matches.append(
-                            RuleMatch(
-                                location, title_message.format(x, title_errors)
-                            )
-                        )
-                    if spell_errors:
-                        matches.append(
-                            RuleMatch(
-                                location, spell_message.format(x, spell_errors)
-                            )
+                    checks.append(
+                        (
+                            len(matches),
+                            location,
+                            description,
+                            functools.partial(title_message.format, x),
+                            functools.partial(spell_message.format, x),
                         )
+                    )
             if "Metadata" not in cfn.template.keys():
                 matches.append(
                     RuleMatch(
@@ -231,27 +301,19 @@ class Base(CloudFormationLintRule):
                             "default",
                         ]
                         description = x["Label"]["default"]
-                        spell_errors, title_errors = self.get_errors(
-                            description, spell, custom_dict, sentence_case_exclude,
-                        )
-                        if title_errors:
-                            matches.append(
-                                RuleMatch(
-                                    location,
-                                    title_message.format(
-                                        x["Label"]["default"], title_errors
-                                    ),
-                                )
-                            )
-                        if spell_errors:
-                            matches.append(
-                                RuleMatch(
-                                    location,
-                                    spell_message.format(
-                                        x["Label"]["default"], spell_errors
-                                    ),
-                                )
+                        checks.append(
+                            (
+                                len(matches),
+                                location,
+                                description,
+                                functools.partial(
+                                    title_message.format, description
+                                ),
+                                functools.partial(
+                                    spell_message.format, description
+                                ),
                             )
+                        )
                     count += 1
                 for x in cfn.template["Metadata"][
                     "AWS::CloudFormation::Interface"
@@ -288,22 +350,18 @@ class Base(CloudFormationLintRule):
                         description = cfn.template["Metadata"][
                             "AWS::CloudFormation::Interface"
                         ]["ParameterLabels"][x]["default"]
-                        spell_errors, title_errors = self.get_errors(
-                            description, spell, custom_dict, sentence_case_exclude,
-                        )
-                        if title_errors:
-                            matches.append(
-                                RuleMatch(
-                                    location,
-                                    title_message.format(title_errors),
-                                )
-                            )
-                        if spell_errors:
-                            matches.append(
-                                RuleMatch(
-                                    location,
-                                    spell_message.format(spell_errors),
-                                )
+                        checks.append(
+                            (
+                                len(matches),
+                                location,
+                                description,
+                                title_message.format,
+                                spell_message.format,
                             )
+                        )
                     count += 1
+            matches = self.check_all(
+                matches, checks, spell, custom_dict, sentence_case_exclude
+            )
+            spell.save()
         return matches
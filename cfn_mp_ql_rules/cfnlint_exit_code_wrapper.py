@@ -1,16 +1,458 @@
-import pkg_resources
+import argparse
+import functools
+import importlib.metadata
+import json
+import logging
+import multiprocessing
+import os
 import sys
+from cfn_mp_ql_rules.result_cache import (
+    DEFAULT_MAX_SIZE_MB,
+    ResultCache,
+    directory_digest,
+    file_digest,
+)
 
 EXIT_CODES = {
     4:0,
     8:0,
     12:0
 }
+# Rule configuration that affects which matches a template produces
+RULE_CONFIG_ARGS = [
+    "append_rules",
+    "build_graph",
+    "configure_rules",
+    "custom_rules",
+    "ignore_bad_template",
+    "ignore_checks",
+    "include_checks",
+    "include_experimental",
+    "mandatory_checks",
+    "override_spec",
+    "registry_schemas",
+    "regions",
+]
+
+RULE_LOCATION = os.path.dirname(os.path.abspath(__file__))
+LOGGER = logging.getLogger("cfnlint")
+
+
+def wrapper_arg_parser():
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="lint templates in this many worker processes, 0 for one per CPU",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="cache lint results in this directory, keyed by template content",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE_MB,
+        help=f"maximum size of the cache directory in MB (default {DEFAULT_MAX_SIZE_MB})",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="print cache hit/miss counts to stderr",
+    )
+    parser.add_argument(
+        "--rule-timings",
+        metavar="FILE",
+        help="write per-rule timings, allocations and match counts to FILE as JSON",
+    )
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="only lint templates changed since the merge base of REF and HEAD, and their nested stack parents and children",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="report where the wrapper's start up time goes, and exit",
+    )
+    return parser
+
+
+def rule_pack_fingerprint(custom_rule_location):
+    """
+    the rule pack's version and files, and the IAM and spelling data its
+    rules read from policyuniverse and pyspellchecker
+    """
+    from cfn_mp_ql_rules import iam_data, spelling
+
+    try:
+        version = importlib.metadata.version("cfn_mp_ql_rules")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return [
+        version,
+        directory_digest(custom_rule_location),
+        iam_data.source_digest(),
+        spelling.dictionary_version(),
+    ]
+
+
+def rule_config(args):
+    """the cli and config file values that decide which rules run and how"""
+    config = {
+        name: [getattr(args.cli_args, name, None), args.file_args.get(name)]
+        for name in RULE_CONFIG_ARGS
+    }
+    config["region_env"] = [
+        os.environ.get("AWS_REGION"),
+        os.environ.get("AWS_DEFAULT_REGION"),
+    ]
+    return config
+
+
+def nested_stack_dependencies(filename, template):
+    """
+    Child templates the stack rules read while linting filename, as
+    [path, digest] pairs. Returns None if a child can't be resolved, in which
+    case the result should not be cached.
+    """
+    from cfn_mp_ql_rules.incremental import nested_stack_children
+
+    children = nested_stack_children(filename, template)
+    if children is None:
+        return None
+    return [[child, file_digest(child)] for child in children]
+
+
+def match_to_dict(match):
+    """a plain, json and pickle safe copy of what the formatters read from a match"""
+    path = getattr(match, "path", None)
+    return {
+        "linenumber": match.linenumber,
+        "columnnumber": match.columnnumber,
+        "linenumberend": match.linenumberend,
+        "columnnumberend": match.columnnumberend,
+        "rule": match.rule.id,
+        "message": str(match.message),
+        # used by the json formatter; templates nodes (str_node etc) don't pickle
+        "path": json.loads(json.dumps(path, default=str)),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def builtin_error_rules():
+    """the rules cfn-lint reports without registering them in the rules collection"""
+    import cfnlint.rules
+
+    return {
+        rule.id: rule
+        for rule in [
+            cfnlint.rules.ParseError(),
+            cfnlint.rules.TransformError(),
+            cfnlint.rules.RuleError(),
+        ]
+    }
+
+
+def find_rule(rule_id, rules):
+    return rules.all_rules.get(rule_id) or builtin_error_rules().get(rule_id)
+
+
+def dict_to_match(data, filename, rules):
+    import cfnlint.rules
+
+    match = cfnlint.rules.Match(
+        data["linenumber"],
+        data["columnnumber"],
+        data["linenumberend"],
+        data["columnnumberend"],
+        filename,
+        find_rule(data["rule"], rules),
+        data["message"],
+    )
+    if data.get("path") is not None:
+        match.path = data["path"]
+    return match
+
+
+def cfn_lint_entry_point():
+    """
+    cfn-lint's console script function. Only cfn-lint's own metadata is
+    read, rather than scanning every installed distribution.
+    """
+    try:
+        entry_points = importlib.metadata.distribution("cfn-lint").entry_points
+    except importlib.metadata.PackageNotFoundError:
+        entry_points = []
+    for entry_point in entry_points:
+        if (
+            entry_point.group == "console_scripts"
+            and entry_point.name == "cfn-lint"
+        ):
+            return entry_point.load()
+    import cfnlint.__main__
+
+    return cfnlint.__main__.main
+
+
+def get_rules(args):
+    import cfnlint.core
+
+    rules = cfnlint.core.get_used_rules()
+    if rules is not None:
+        return rules
+    # every template was a cache hit, so cfn-lint never loaded the rules.
+    # Loading them into cfn-lint's own cache lets later templates reuse them,
+    # but only a private function does that, so fall back to loading a
+    # collection of our own if it's gone
+    build_rule_cache = getattr(cfnlint.core, "_build_rule_cache", None)
+    if build_rule_cache is not None:
+        build_rule_cache(args)
+        rules = cfnlint.core.get_used_rules()
+    if rules is None:
+        rules = cfnlint.core.get_rules(
+            args.append_rules,
+            args.ignore_checks,
+            args.include_checks,
+            args.configure_rules,
+            args.include_experimental,
+            args.mandatory_checks,
+            args.custom_rules,
+        )
+    return rules
+
+
+def lint_file(filename, args):
+    """Lint one template the same way cfnlint.core.get_matches does"""
+    import cfnlint.core
+
+    (template, rules, errors) = cfnlint.core.get_template_rules(filename, args)
+    if not errors and template:
+        matches = cfnlint.core.run_cli(
+            filename,
+            template,
+            rules,
+            args.regions,
+            args.override_spec,
+            args.build_graph,
+            args.registry_schemas,
+            args.mandatory_checks,
+        )
+        return list(matches), template
+    return list(errors or []), template
+
+
+def lint_file_to_dicts(filename, args, with_dependencies):
+    """
+    Lint one template, returning its matches as dicts and, when
+    with_dependencies is set, the nested stack files its result depends on
+    """
+    matches, template = lint_file(filename, args)
+    dependencies = None
+    if with_dependencies:
+        dependencies = nested_stack_dependencies(filename, template)
+    return [match_to_dict(m) for m in matches], dependencies
+
+
+_WORKER_ARGS = None
+
+
+def _init_worker(cfnlint_argv):
+    import cfnlint.config
+
+    global _WORKER_ARGS
+    _WORKER_ARGS = cfnlint.config.ConfigMixIn(cfnlint_argv)
+    # load the rule pack once per worker; its IAM and spelling data are
+    # loaded by the first template that needs them
+    get_rules(_WORKER_ARGS)
+
+
+def _lint_in_worker(job):
+    import cfnlint.core
+
+    filename, with_dependencies = job
+    try:
+        return lint_file_to_dicts(filename, _WORKER_ARGS, with_dependencies)
+    except cfnlint.core.CfnLintExitException as e:
+        # exit_code doesn't survive pickling, so hand it back explicitly
+        return e.exit_code, str(e)
+
+
+def lint_files(
+    filenames, args, cfnlint_argv, cache=None, cache_key_parts=None, jobs=1
+):
+    """
+    Lint filenames, returning a list of matches per file in the same order.
+    Cached results are replayed, the rest are linted serially or across a
+    pool of jobs worker processes.
+    """
+    import cfnlint.core
+
+    rules = get_rules(args)
+    results = [None] * len(filenames)
+    keys = {}
+    pending = []
+    for idx, filename in enumerate(filenames):
+        if cache is not None and filename is not None:
+            key = cache.key(
+                os.path.abspath(filename),
+                file_digest(filename),
+                *cache_key_parts,
+            )
+            entry = cache.get(key)
+            if entry is not None and all(
+                find_rule(m["rule"], rules) for m in entry["matches"]
+            ):
+                results[idx] = entry["matches"]
+                continue
+            keys[idx] = key
+        pending.append(idx)
+
+    # stdin can only be read by this process
+    parallel = [i for i in pending if filenames[i] is not None] if jobs > 1 else []
+    serial = [i for i in pending if i not in parallel]
+    for idx in serial:
+        results[idx] = lint_file_to_dicts(filenames[idx], args, idx in keys)
+    if parallel:
+        with multiprocessing.Pool(
+            min(jobs, len(parallel)), _init_worker, (cfnlint_argv,)
+        ) as pool:
+            worker_results = pool.imap(
+                _lint_in_worker,
+                [(filenames[i], i in keys) for i in parallel],
+            )
+            for idx, result in zip(parallel, worker_results):
+                if isinstance(result[0], int):
+                    raise cfnlint.core.CfnLintExitException(
+                        result[1], result[0]
+                    )
+                results[idx] = result
+
+    for idx in pending:
+        match_dicts, dependencies = results[idx]
+        if idx in keys and dependencies is not None:
+            cache.put(
+                keys[idx],
+                {"matches": match_dicts, "dependencies": dependencies},
+            )
+        results[idx] = match_dicts
+    return [
+        [dict_to_match(m, filename, rules) for m in match_dicts]
+        for filename, match_dicts in zip(filenames, results)
+    ]
+
+
+def run(
+    cfnlint_argv,
+    custom_rule_location,
+    cache=None,
+    jobs=1,
+    rule_timings=None,
+    changed_since=None,
+):
+    """
+    cfnlint.__main__.main, with results served from cache and/or linted in
+    parallel. With rule_timings set, the custom rules are instrumented while
+    linting and the timings report is written to that path. With
+    changed_since set, only the templates a git change affects are linted.
+    """
+    import cfnlint.core
+
+    timings = None
+    try:
+        (args, filenames, formatter) = cfnlint.core.get_args_filenames(
+            cfnlint_argv
+        )
+        if changed_since:
+            from cfn_mp_ql_rules.incremental import select_templates
+
+            filenames = select_templates(filenames, changed_since)
+        if rule_timings:
+            from cfn_mp_ql_rules.rule_timings import RuleTimings
+
+            timings = RuleTimings(custom_rule_location)
+            timings.instrument(get_rules(args))
+        cache_key_parts = None
+        if cache is not None:
+            import cfnlint.version
+
+            cache_key_parts = [
+                rule_pack_fingerprint(custom_rule_location),
+                cfnlint.version.__version__,
+                rule_config(args),
+            ]
+        matches = []
+        for file_matches in lint_files(
+            filenames, args, cfnlint_argv, cache, cache_key_parts, jobs
+        ):
+            matches.extend(file_matches)
+        rules = get_rules(args)
+        matches_output = formatter.print_matches(matches, rules, filenames)
+
+        if matches_output:
+            if args.output_file:
+                with open(args.output_file, "w", encoding="utf-8") as output_file:
+                    output_file.write(matches_output)
+            else:
+                print(matches_output)
+
+        return cfnlint.core.get_exit_code(matches, args.non_zero_exit_code)
+    except cfnlint.core.CfnLintExitException as e:
+        LOGGER.error(str(e))
+        return e.exit_code
+    finally:
+        if timings is not None:
+            timings.uninstrument()
+            timings.write_report(rule_timings)
+
+
+def wrapped_main(argv, in_process=False):
+    """
+    Run wrapped-cfn-lint with argv and return its exit code. With in_process
+    set, cfn-lint is always run through run() rather than its console script.
+    """
+    wrapper_args, cfnlint_argv = wrapper_arg_parser().parse_known_args(argv)
+    if wrapper_args.startup_report:
+        from cfn_mp_ql_rules.startup_report import print_startup_report
+
+        print_startup_report()
+        return 0
+    custom_rule_location = RULE_LOCATION
+    cfnlint_argv = [f"-a={custom_rule_location}"] + cfnlint_argv
+    jobs = wrapper_args.jobs or os.cpu_count() or 1
+    cache = None
+    if wrapper_args.rule_timings:
+        # time every template in this process, rather than replaying cached
+        # results or splitting the work across workers
+        jobs = 1
+    elif wrapper_args.cache_dir:
+        cache = ResultCache(
+            wrapper_args.cache_dir, wrapper_args.cache_max_size * 1024 * 1024
+        )
+    if (
+        in_process
+        or cache is not None
+        or jobs > 1
+        or wrapper_args.rule_timings
+        or wrapper_args.changed_since
+    ):
+        ec = run(
+            cfnlint_argv,
+            custom_rule_location,
+            cache,
+            jobs,
+            wrapper_args.rule_timings,
+            wrapper_args.changed_since,
+        )
+    else:
+        entrypoint_func = cfn_lint_entry_point()
+        sys.argv[1:] = cfnlint_argv
+        ec = entrypoint_func()
+    if cache is not None and wrapper_args.cache_stats:
+        print(cache.format_stats(), file=sys.stderr)
+    return EXIT_CODES.get(ec, ec)
 
 
 def main():
-    entrypoint_func = pkg_resources.get_entry_map('cfn-lint', 'console_scripts')['cfn-lint'].load()
-    custom_rule_location = pkg_resources.resource_filename('cfn_mp_ql_rules', "")
-    sys.argv[1:] = [f"-a={custom_rule_location}"] + sys.argv[1:]
-    ec = entrypoint_func()
-    sys.exit(EXIT_CODES.get(ec, ec))
+    sys.exit(wrapped_main(sys.argv[1:]))
@@ -23,6 +23,95 @@ def deep_get(source_dict, list_of_keys, default_value=None):
     return x
 
 
+class TemplateKeyIndex:
+    """
+    Every key in a template, recorded in a single walk.
+    search_deep_keys() returns the same results, in the same order, as
+    cfnlint.template.Template.search_deep_keys for a plain string key.
+    """
+
+    def __init__(self, template, globals_section=None):
+        self._keys = {}
+        self._containers = {}
+        self._walk(template, [])
+        # Globals are removed during a transform, cfn-lint checks them after the template
+        if globals_section:
+            self._walk(globals_section, ["Globals"])
+
+    def _walk(self, item, path):
+        if isinstance(item, dict):
+            for key, value in item.items():
+                path.append(key)
+                try:
+                    self._keys.setdefault(key, []).append(path + [value])
+                    self._containers.setdefault(key, []).append(item)
+                except TypeError:
+                    # unhashable keys can't be searched for by cfn-lint either
+                    pass
+                self._walk(value, path)
+                path.pop()
+        elif isinstance(item, list):
+            for idx, value in enumerate(item):
+                path.append(idx)
+                self._walk(value, path)
+                path.pop()
+
+    def search_deep_keys(self, key):
+        """returns a list of [path..., value] lists, one for each occurrence of key"""
+        return [result[:] for result in self._keys.get(key, [])]
+
+    def search_containers(self, key):
+        """returns a list of (path, mapping) pairs, one for each mapping containing key, in search_deep_keys order"""
+        return [
+            (result[:-2], container)
+            for result, container in zip(
+                self._keys.get(key, []), self._containers.get(key, [])
+            )
+        ]
+
+
+def get_template_index(cfn):
+    """
+    Returns the TemplateKeyIndex for a cfnlint Template, building it on first use.
+    The index is memoized on the Template object so all rules share one walk.
+    """
+    index = getattr(cfn, "_cfn_mp_ql_rules_key_index", None)
+    if index is None:
+        index = TemplateKeyIndex(
+            cfn.template, cfn.transform_pre.get("Globals")
+        )
+        cfn._cfn_mp_ql_rules_key_index = index
+    return index
+
+
+def string_leaves(item, path):
+    """
+    [(path, string)] for each string leaf under item, which sits at path.
+    Numbers are included, as strings, since YAML reads unquoted digits as
+    integers.
+    """
+    leaves = []
+    _collect_string_leaves(item, list(path), leaves)
+    return leaves
+
+
+def _collect_string_leaves(item, path, leaves):
+    if isinstance(item, str):
+        leaves.append((path[:], item))
+    elif isinstance(item, dict):
+        for key, value in item.items():
+            path.append(key)
+            _collect_string_leaves(value, path, leaves)
+            path.pop()
+    elif isinstance(item, list):
+        for idx, value in enumerate(item):
+            path.append(idx)
+            _collect_string_leaves(value, path, leaves)
+            path.pop()
+    elif isinstance(item, (int, float)) and not isinstance(item, bool):
+        leaves.append((path[:], str(item)))
+
+
 def parameter_violating_default_noecho(parameter):
     if not parameter:
         return False
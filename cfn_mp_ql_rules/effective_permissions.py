@@ -0,0 +1,171 @@
+"""
+The actions each IAM role, user and group in a template is allowed, across
+its inline Policies, the AWS::IAM::Policy and AWS::IAM::ManagedPolicy
+resources attached to it and, for users, the groups it is in.
+
+Action sets are iam_data.action_bits bitsets, so unions, Deny differences
+and NotAction complements are single bitwise operations on ints. Only
+literal action strings are counted; actions built with intrinsic functions
+can't be resolved and are left out. A Deny only removes actions when it
+applies to every resource unconditionally.
+"""
+import heapq
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.iam_policy import get_policy_model
+
+PRINCIPAL_TYPES = {
+    "AWS::IAM::Role": "Roles",
+    "AWS::IAM::User": "Users",
+    "AWS::IAM::Group": "Groups",
+}
+POLICY_TYPES = ["AWS::IAM::Policy", "AWS::IAM::ManagedPolicy"]
+
+
+def actions_bits(actions):
+    """bitset of the actions an Action or NotAction value lists"""
+    if not isinstance(actions, list):
+        actions = [actions]
+    bits = 0
+    for action in actions:
+        if isinstance(action, str):
+            bits |= iam_data.action_bits(action)
+    return bits
+
+
+def statement_bits(statement):
+    """bitset of the actions a statement applies to"""
+    if statement.action is not None:
+        return actions_bits(statement.action)
+    if statement.not_action is not None:
+        return iam_data.action_bits("*") & ~actions_bits(statement.not_action)
+    return 0
+
+
+def breadth(bits, top=5):
+    """
+    (number of actions, number of services, number of services whose every
+    action is included, [(service, number of actions)] for the top broadest
+    services) for an action bitset
+    """
+    counts = iam_data.service_action_counts(bits)
+    totals = iam_data.service_totals()
+    entire = sum(
+        1 for service, count in counts.items() if count == totals[service]
+    )
+    broadest = heapq.nlargest(top, counts.items(), key=lambda c: c[1])
+    return sum(counts.values()), len(counts), entire, broadest
+
+
+def _refs(value):
+    # logical ids referenced by a list of {"Ref": ...}
+    if not isinstance(value, list):
+        return []
+    return [
+        item["Ref"]
+        for item in value
+        if isinstance(item, dict) and isinstance(item.get("Ref"), str)
+    ]
+
+
+def _policy_statements(cfn):
+    # {logical id: [statements]} for the identity policies each resource defines
+    statements = {}
+    for statement in get_policy_model(cfn).statements():
+        path = statement.path
+        if (
+            len(path) > 3
+            and path[0] == "Resources"
+            and path[2] == "Properties"
+            and path[3] in ("Policies", "PolicyDocument")
+        ):
+            statements.setdefault(path[1], []).append(statement)
+    return statements
+
+
+def _allowed(statements):
+    allowed = 0
+    denied = 0
+    for statement in statements:
+        if statement.effect == "Allow":
+            allowed |= statement_bits(statement)
+        elif (
+            statement.effect == "Deny"
+            and statement.resource in ["*", ["*"]]
+            and not statement.condition
+        ):
+            denied |= statement_bits(statement)
+    return allowed, denied
+
+
+class EffectivePermissions:
+    """{principal logical id: allowed action bitset} for a template"""
+
+    def __init__(self, cfn):
+        resources = cfn.template.get("Resources", {})
+        if not isinstance(resources, dict):
+            resources = {}
+        self.principals = {}
+        # principal -> logical ids whose policies apply to it
+        sources = {}
+        groups = {}
+        for name, resource in resources.items():
+            if not isinstance(resource, dict):
+                continue
+            properties = resource.get("Properties")
+            if not isinstance(properties, dict):
+                properties = {}
+            resource_type = resource.get("Type")
+            if resource_type in PRINCIPAL_TYPES:
+                self.principals[name] = resource_type
+                sources.setdefault(name, []).append(name)
+                sources[name] += _refs(properties.get("ManagedPolicyArns"))
+                if resource_type == "AWS::IAM::User":
+                    groups.setdefault(name, []).extend(
+                        _refs(properties.get("Groups"))
+                    )
+            elif resource_type in POLICY_TYPES:
+                for prop in PRINCIPAL_TYPES.values():
+                    for principal in _refs(properties.get(prop)):
+                        sources.setdefault(principal, []).append(name)
+            elif resource_type == "AWS::IAM::UserToGroupAddition":
+                group = properties.get("GroupName")
+                if isinstance(group, dict) and isinstance(
+                    group.get("Ref"), str
+                ):
+                    for user in _refs(properties.get("Users")):
+                        groups.setdefault(user, []).append(group["Ref"])
+        statements = _policy_statements(cfn)
+        allowed = {}
+        denied = {}
+        for name in self.principals:
+            allowed[name], denied[name] = _allowed(
+                statement
+                for source in sources[name]
+                for statement in statements.get(source, [])
+            )
+        for user, user_groups in groups.items():
+            for group in user_groups:
+                if user in allowed and group in allowed:
+                    allowed[user] |= allowed[group]
+                    denied[user] |= denied[group]
+        self._bits = {name: allowed[name] & ~denied[name] for name in allowed}
+
+    def allowed(self, principal):
+        """allowed action bitset of a principal's logical id"""
+        return self._bits[principal]
+
+    def items(self):
+        """(principal logical id, allowed action bitset) pairs"""
+        return self._bits.items()
+
+
+def get_effective_permissions(cfn):
+    """
+    Returns the EffectivePermissions for a cfnlint Template, computing them
+    on first use and memoizing them on the Template object.
+    """
+    permissions = getattr(cfn, "_cfn_mp_ql_rules_effective_permissions", None)
+    if permissions is None:
+        permissions = EffectivePermissions(cfn)
+        cfn._cfn_mp_ql_rules_effective_permissions = permissions
+    return permissions
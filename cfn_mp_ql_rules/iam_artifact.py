@@ -0,0 +1,265 @@
+"""
+Compact, read-only binary form of the IAM datasets, queried through mmap.
+
+The artifact merges policyuniverse's action names, data/iam_methods.json and
+data/granular_permissions.json. All integers are little-endian; every
+section starts on a 4 byte boundary.
+
+  header          magic, format version, action count, resource type count,
+                  sha256 of the sources, then the offset of each section
+  action names    u32 offsets (count + 1) into an ascii blob, sorted by the
+                  lower case name, and the same blob in lower case, so
+                  lookups are a binary search over bytes
+  flags           u8 per action
+  resource types  u32 offsets (count + 1) into a u16 array of resource type
+                  ids, one run per action
+  type names      u32 offsets (resource type count + 1) into a utf-8 blob of
+                  "service/type" names
+
+Usage: python -m cfn_mp_ql_rules.iam_artifact [--output PATH]
+"""
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"CFNMPIAM"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIII32s8I")
+U32 = struct.Struct("<I")
+U16 = struct.Struct("<H")
+
+# flags
+POLICYUNIVERSE = 1  # known to policyuniverse, the name is in its canonical case
+GRANULAR = 2  # has resource types in granular_permissions.json
+RESOURCE_ONLY = 4  # listed as resource-only in iam_methods.json
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _align(buf):
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def _string_table(strings):
+    offsets = bytearray()
+    blob = bytearray()
+    for s in strings:
+        offsets += U32.pack(len(blob))
+        blob += s.encode()
+    offsets += U32.pack(len(blob))
+    return offsets, blob
+
+
+def build_artifact(digest, service_data, resource_only, resource_types):
+    """
+    Returns the artifact bytes for policyuniverse's service_data, the
+    resource-only actions and {action: resource types}, as iam_dataset reads
+    them from iam_methods.json and granular_permissions.json
+    """
+    actions = {}
+    flags = {}
+
+    def add(name, flag):
+        key = name.lower()
+        if flag == POLICYUNIVERSE or key not in actions:
+            actions[key] = name
+        flags[key] = flags.get(key, 0) | flag
+
+    for sd in service_data.values():
+        for k in sd["actions"].keys():
+            add(f"{sd['prefix']}:{k}", POLICYUNIVERSE)
+    for name in resource_only:
+        add(name, RESOURCE_ONLY)
+    for name in resource_types:
+        add(name, GRANULAR)
+
+    keys = sorted(actions)
+    for key in keys:
+        if not actions[key].isascii():
+            raise ArtifactError(f"unexpected action name: {actions[key]}")
+    type_ids = {}
+    type_offsets = bytearray()
+    type_runs = bytearray()
+    for key in keys:
+        type_offsets += U32.pack(len(type_runs) // U16.size)
+        service = actions[key].split(":")[0]
+        for k in sorted(resource_types.get(actions[key], [])):
+            type_id = type_ids.setdefault(f"{service}/{k}", len(type_ids))
+            type_runs += U16.pack(type_id)
+    type_offsets += U32.pack(len(type_runs) // U16.size)
+    if len(type_ids) > 0xFFFF:
+        raise ArtifactError(f"too many resource types: {len(type_ids)}")
+
+    name_offsets, names = _string_table(actions[key] for key in keys)
+    sections = [
+        name_offsets,
+        names,
+        names.lower(),
+        bytes(flags[key] for key in keys),
+        type_offsets,
+        type_runs,
+        *_string_table(type_ids),
+    ]
+    body = bytearray()
+    offsets = []
+    for section in sections:
+        _align(body)
+        offsets.append(HEADER.size + len(body))
+        body += section
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(keys),
+        len(type_ids),
+        bytes.fromhex(digest),
+        *offsets,
+    )
+    return header + bytes(body)
+
+
+class IAMArtifact:
+    """Lookups over an artifact's bytes, an mmap or anything else buffer-like"""
+
+    def __init__(self, buf):
+        if len(buf) < HEADER.size:
+            raise ArtifactError("truncated header")
+        (
+            magic,
+            version,
+            self.count,
+            self.type_count,
+            digest,
+            name_offsets,
+            self._names,
+            self._keys,
+            self._flags,
+            type_offsets,
+            type_runs,
+            type_name_offsets,
+            self._type_names,
+        ) = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ArtifactError(f"not a version {FORMAT_VERSION} artifact")
+        self.digest = digest.hex()
+        self._buf = buf
+        self._name_offsets = self._array("I", name_offsets, self.count + 1)
+        self._type_offsets = self._array("I", type_offsets, self.count + 1)
+        self._type_runs = self._array(
+            "H", type_runs, self._type_offsets[self.count]
+        )
+        self._type_name_offsets = self._array(
+            "I", type_name_offsets, self.type_count + 1
+        )
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _array(self, typecode, offset, count):
+        """count integers from offset, without copying them where possible"""
+        view = memoryview(self._buf)[offset:]
+        view = view[: count * array.array(typecode).itemsize]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        values = array.array(typecode, view)
+        values.byteswap()
+        return values
+
+    def name(self, idx):
+        start = self._names + self._name_offsets[idx]
+        end = self._names + self._name_offsets[idx + 1]
+        return self._buf[start:end].decode()
+
+    def flags(self, idx):
+        return self._buf[self._flags + idx]
+
+    def find(self, action):
+        """index of action, matched case insensitively, or None"""
+        try:
+            key = action.lower().encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        buf, offsets, keys = self._buf, self._name_offsets, self._keys
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if buf[keys + offsets[mid] : keys + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if (
+            lo < self.count
+            and buf[keys + offsets[lo] : keys + offsets[lo + 1]] == key
+        ):
+            return lo
+        return None
+
+    def prefix_range(self, prefix):
+        """range of the indexes of the actions whose lower case name starts with prefix"""
+        key = prefix.lower().encode("ascii")
+        buf, offsets, keys = self._buf, self._name_offsets, self._keys
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if buf[keys + offsets[mid] : keys + offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = lo
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            end = keys + offsets[mid]
+            if buf[end : min(end + len(key), keys + offsets[mid + 1])] == key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return range(start, lo)
+
+    def resource_type_ids(self, idx):
+        return self._type_runs[
+            self._type_offsets[idx] : self._type_offsets[idx + 1]
+        ].tolist()
+
+    def resource_type_name(self, type_id):
+        start = self._type_names + self._type_name_offsets[type_id]
+        end = self._type_names + self._type_name_offsets[type_id + 1]
+        return self._buf[start:end].decode()
+
+    def __iter__(self):
+        """index, name and flags of every action, in lower case name order"""
+        for idx in range(self.count):
+            yield idx, self.name(idx), self.flags(idx)
+
+
+def main():
+    from cfn_mp_ql_rules import iam_data
+
+    parser = argparse.ArgumentParser(
+        description="Build the IAM data artifact the IAM rules read"
+    )
+    parser.add_argument(
+        "--output",
+        default=iam_data.PACKAGED_ARTIFACT,
+        help=f"where to write the artifact (default {iam_data.PACKAGED_ARTIFACT})",
+    )
+    options = parser.parse_args()
+    iam_data.write_artifact(options.output)
+    artifact = IAMArtifact.open(options.output)
+    print(
+        f"wrote {options.output}: {artifact.count} actions, "
+        f"{artifact.type_count} resource types, "
+        f"{os.path.getsize(options.output)} bytes",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+IAM datasets used by the IAM rules. Each one is loaded on first use, so
+linting templates without IAM policies doesn't pay for parsing them.
+
+Action lookups are served from a compact artifact (see iam_artifact) that is
+memory-mapped read-only, so parallel workers share its pages. The artifact is
+read from the package's data directory if it was built for the installed
+sources, otherwise it is built once into the user's cache directory.
+"""
+import bisect
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import logging
+import os
+import re
+import tempfile
+from cfn_mp_ql_rules import iam_artifact, iam_dataset
+from cfn_mp_ql_rules.result_cache import cache_dir, file_digest, file_stamp
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SOURCE_FILES = [
+    iam_dataset.RESOURCE_ONLY_FILE,
+    iam_dataset.RESOURCE_TYPES_FILE,
+]
+PACKAGED_ARTIFACT = os.path.join(DATA_DIR, "iam_data.bin")
+WILDCARDS = re.compile(r"([*?])")
+WILDCARD_REGEX = {"*": ".*", "?": "."}
+EXPANSION_CACHE_SIZE = 4096
+
+
+def _load_json(name):
+    with open(os.path.join(DATA_DIR, name)) as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def _policyuniverse():
+    # policyuniverse messes with the global logger, so need to reset loglevel after it's done.
+    logger = logging.getLogger()
+    orig_level = logger.level
+    from policyuniverse import service_data
+    from policyuniverse.expander_minimizer import get_actions_from_statement
+
+    logger.setLevel(orig_level)
+    return service_data, get_actions_from_statement
+
+
+def service_data():
+    """policyuniverse's service data, keyed by service name"""
+    return _policyuniverse()[0]
+
+
+def get_actions_from_statement(statement):
+    """lower case actions matched by a statement's Action/NotAction, from policyuniverse"""
+    return _policyuniverse()[1](statement)
+
+
+def _policyuniverse_data_path():
+    # the data file policyuniverse builds service_data from, found without importing it
+    spec = importlib.util.find_spec("policyuniverse")
+    return os.path.join(os.path.dirname(spec.origin), "data.json")
+
+
+def source_digest():
+    """
+    sha256 over the artifact format, the package's data files and
+    policyuniverse's version, size and modification time. policyuniverse's
+    data.json is 8 MB, too much to hash in every process, and is only
+    replaced by reinstalling it.
+    """
+    h = hashlib.sha256(str(iam_artifact.FORMAT_VERSION).encode())
+    for name in SOURCE_FILES:
+        h.update((file_digest(os.path.join(DATA_DIR, name)) or "").encode())
+    try:
+        version = importlib.metadata.version("policyuniverse")
+    except importlib.metadata.PackageNotFoundError:
+        version = ""
+    h.update(version.encode())
+    h.update((file_stamp(_policyuniverse_data_path()) or "").encode())
+    return h.hexdigest()
+
+
+def build_artifact(digest):
+    return iam_artifact.build_artifact(
+        digest,
+        service_data(),
+        iam_dataset.read_resource_only(
+            _load_json(iam_dataset.RESOURCE_ONLY_FILE)
+        ),
+        iam_dataset.read_resource_types(
+            _load_json(iam_dataset.RESOURCE_TYPES_FILE)
+        ),
+    )
+
+
+def write_artifact(path, digest=None):
+    """Atomically build the artifact for the installed sources into path"""
+    data = build_artifact(digest or source_digest())
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return data
+
+
+def _open_artifact(path, digest):
+    try:
+        artifact = iam_artifact.IAMArtifact.open(path)
+    except (OSError, ValueError, iam_artifact.ArtifactError):
+        return None
+    if artifact.digest != digest:
+        return None
+    return artifact
+
+
+@functools.lru_cache(maxsize=None)
+def artifact():
+    """The IAMArtifact for the installed sources"""
+    digest = source_digest()
+    cached = os.path.join(cache_dir(), f"iam_data-{digest[:16]}.bin")
+    for path in [PACKAGED_ARTIFACT, cached]:
+        found = _open_artifact(path, digest)
+        if found is not None:
+            return found
+    try:
+        write_artifact(cached, digest)
+    except OSError:
+        # no writable cache, keep this process's copy in memory
+        return iam_artifact.IAMArtifact(build_artifact(digest))
+    return iam_artifact.IAMArtifact.open(cached)
+
+
+def canonical_action(action):
+    """action as AWS spells it, if policyuniverse knows it, otherwise unchanged"""
+    a = artifact()
+    idx = a.find(action)
+    if idx is None or not a.flags(idx) & iam_artifact.POLICYUNIVERSE:
+        return action
+    return a.name(idx)
+
+
+def expand_action(pattern):
+    """
+    Frozen set of the policyuniverse actions matching an IAM action pattern,
+    with * and ? wildcards, case insensitively and in AWS's spelling. Only
+    the actions sharing the pattern's literal prefix are compared. A pattern
+    matching nothing expands to itself, lower cased, as policyuniverse does.
+    Expansions are memoized per process; see cache_stats().
+    """
+    return _expand_action(pattern.lower(), artifact().digest)
+
+
+@functools.lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _expand_action(pattern, digest):  # pylint: disable=unused-argument
+    # digest only keys the cache, so expansions from another dataset aren't reused
+    a = artifact()
+    expanded = {a.name(idx) for idx in _matching_indexes(pattern)}
+    return frozenset(expanded or {pattern})
+
+
+def _matching_indexes(pattern):
+    # artifact indexes of the policyuniverse actions matching a lower case pattern
+    prefix = WILDCARDS.split(pattern, 1)[0]
+    regex = re.compile(
+        "".join(
+            WILDCARD_REGEX.get(part, re.escape(part))
+            for part in WILDCARDS.split(pattern)
+        ),
+        re.DOTALL,
+    )
+    a = artifact()
+    try:
+        candidates = a.prefix_range(prefix)
+    except UnicodeEncodeError:
+        candidates = range(0)
+    for idx in candidates:
+        if not a.flags(idx) & iam_artifact.POLICYUNIVERSE:
+            continue
+        if regex.fullmatch(a.name(idx).lower()):
+            yield idx
+
+
+def action_bits(pattern):
+    """
+    The policyuniverse actions matching an IAM action pattern, as expand_action
+    does, encoded as an int with bit i set for the action at artifact index i.
+    A pattern matching nothing is 0. Memoized per process; see cache_stats().
+    """
+    return _action_bits(pattern.lower(), artifact().digest)
+
+
+@functools.lru_cache(maxsize=EXPANSION_CACHE_SIZE)
+def _action_bits(pattern, digest):  # pylint: disable=unused-argument
+    bits = bytearray((artifact().count + 7) // 8)
+    for idx in _matching_indexes(pattern):
+        bits[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bits, "little")
+
+
+def action_count(bits):
+    """number of actions in an action_bits bitset"""
+    return _popcount(bits)
+
+
+# int.bit_count is Python 3.10+
+_popcount = getattr(int, "bit_count", lambda bits: bin(bits).count("1"))
+
+
+def action_names(bits):
+    """actions in an action_bits bitset, in artifact order"""
+    a = artifact()
+    return [
+        a.name(idx)
+        for idx, bit in enumerate(reversed(bin(bits)[2:]))
+        if bit == "1"
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def service_ranges():
+    """
+    [(service prefix, start, stop, number of policyuniverse actions)] artifact
+    index ranges. The artifact is sorted, so each service's actions are
+    contiguous.
+    """
+    ranges = []
+    for idx, name, flags in artifact():
+        service = name.split(":", 1)[0].lower()
+        if not ranges or ranges[-1][0] != service:
+            ranges.append([service, idx, idx, 0])
+        ranges[-1][2] = idx + 1
+        if flags & iam_artifact.POLICYUNIVERSE:
+            ranges[-1][3] += 1
+    return [tuple(r) for r in ranges]
+
+
+def service_action_counts(bits):
+    """{service prefix: number of its actions in bits} for services with any"""
+    universe = action_bits("*")
+    bits &= universe
+    excluded = universe & ~bits
+    if action_count(excluded) >= action_count(bits):
+        return _service_action_counts(bits)
+    # mostly everything, as a NotAction grants: count what's left out instead
+    counts = dict(service_totals())
+    for service, count in _service_action_counts(excluded).items():
+        counts[service] -= count
+    return {service: count for service, count in counts.items() if count}
+
+
+@functools.lru_cache(maxsize=None)
+def _service_starts():
+    return [start for _, start, _, _ in service_ranges()]
+
+
+def _service_action_counts(bits):
+    # visits only the services bits has actions in
+    ranges = service_ranges()
+    starts = _service_starts()
+    # reversed, so bit i is the character at position i
+    digits = bin(bits)[:1:-1]
+    counts = {}
+    idx = digits.find("1")
+    while idx >= 0:
+        service, _, stop, _ = ranges[bisect.bisect_right(starts, idx) - 1]
+        counts[service] = digits.count("1", idx, stop)
+        idx = digits.find("1", stop)
+    return counts
+
+
+@functools.lru_cache(maxsize=None)
+def service_totals():
+    """{service prefix: number of policyuniverse actions}"""
+    return {service: total for service, _, _, total in service_ranges()}
+
+
+@functools.lru_cache(maxsize=None)
+def resource_type_bits():
+    """{'service/type': action_bits of the policyuniverse actions supporting it}"""
+    a = artifact()
+    type_bits = {}
+    for idx, _, flags in a:
+        if not flags & iam_artifact.POLICYUNIVERSE:
+            continue
+        for type_id in a.resource_type_ids(idx):
+            resource_type = a.resource_type_name(type_id)
+            type_bits[resource_type] = type_bits.get(resource_type, 0) | (
+                1 << idx
+            )
+    return type_bits
+
+
+def open_resource_types(bits):
+    """'service/type' names supported by any action in bits"""
+    return [
+        resource_type
+        for resource_type, type_bits in resource_type_bits().items()
+        if type_bits & bits
+    ]
+
+
+def cache_stats():
+    """{cache name: counts} for the process-wide IAM caches"""
+    stats = {}
+    for name, cached in [
+        ("expand_action", _expand_action),
+        ("action_bits", _action_bits),
+    ]:
+        info = cached.cache_info()
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+        }
+    return stats
+
+
+def _exact(action):
+    a = artifact()
+    idx = a.find(action)
+    if idx is None or a.name(idx) != action:
+        return None
+    return idx
+
+
+def is_resource_only(action):
+    """True if iam_methods.json marks action as not supporting resource level permissions"""
+    idx = _exact(action)
+    return idx is not None and bool(
+        artifact().flags(idx) & iam_artifact.RESOURCE_ONLY
+    )
+
+
+def resource_types(action):
+    """'service/type' names of the resource types action supports, from granular_permissions.json"""
+    idx = _exact(action)
+    if idx is None:
+        return []
+    a = artifact()
+    return [a.resource_type_name(i) for i in a.resource_type_ids(idx)]
+
+
+def granular_permissions():
+    """
+    (action, 'service/type' names) for every action in
+    granular_permissions.json that supports a resource type
+    """
+    a = artifact()
+    for idx, name, flags in a:
+        if not flags & iam_artifact.GRANULAR:
+            continue
+        type_ids = a.resource_type_ids(idx)
+        if type_ids:
+            yield name, [a.resource_type_name(i) for i in type_ids]
+
+
+@functools.lru_cache(maxsize=None)
+def resource_type_index():
+    """
+    ({action: frozenset of 'service/type' names}, {'service/type': frozenset
+    of actions}) over the actions in granular_permissions.json that support a
+    resource type
+    """
+    action_types = {}
+    type_actions = {}
+    for action, resource_types in granular_permissions():
+        action_types[action] = frozenset(resource_types)
+        for resource_type in resource_types:
+            type_actions.setdefault(resource_type, set()).add(action)
+    return action_types, {
+        resource_type: frozenset(actions)
+        for resource_type, actions in type_actions.items()
+    }
+
+
+def load_all():
+    """Load every dataset now, for long-lived processes"""
+    _policyuniverse()
+    artifact()
+    resource_type_index()
+    service_ranges()
+    resource_type_bits()
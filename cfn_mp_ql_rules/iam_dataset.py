@@ -0,0 +1,196 @@
+"""
+Regenerates data/iam_methods.json and data/granular_permissions.json against
+the installed policyuniverse release, offline.
+
+Only what the IAM rules read is kept, in a deterministic form that the
+repository's pretty-format-json hook leaves as is (2 space indents, sorted):
+
+  iam_methods.json            sorted list of the actions that don't support
+                              resource level permissions
+  granular_permissions.json   {action: sorted resource types}, for the
+                              actions that support any
+
+Actions are spelled as policyuniverse spells them. Actions policyuniverse
+doesn't know are kept as written, and reported, since the IAM rules still
+rely on them; remove them by hand once AWS retires them. policyuniverse has
+no per-action resource types,
+so those are carried over from the current files; actions new to
+policyuniverse have none until they are added by hand. The legacy formats,
+{action: bool} and {action: {"resource_types": {...}}}, are still read.
+
+Usage: python -m cfn_mp_ql_rules.iam_dataset [--data-dir DIR] [--check]
+"""
+import argparse
+import json
+import os
+import sys
+
+RESOURCE_ONLY_FILE = "iam_methods.json"
+RESOURCE_TYPES_FILE = "granular_permissions.json"
+
+
+def read_resource_only(data):
+    """set of resource-only actions from either iam_methods.json format"""
+    if isinstance(data, dict):
+        return {action for action, value in data.items() if value}
+    return set(data)
+
+
+def read_resource_types(data):
+    """{action: [resource types]} from either granular_permissions.json format"""
+    resource_types = {}
+    for action, value in data.items():
+        if isinstance(value, dict):
+            value = [k for k in value.get("resource_types", {}) if k != ""]
+        if value:
+            resource_types[action] = sorted(value)
+    return resource_types
+
+
+def policyuniverse_actions(service_data):
+    """{lower case action: action} for every action policyuniverse knows"""
+    return {
+        f"{sd['prefix']}:{k}".lower(): f"{sd['prefix']}:{k}"
+        for sd in service_data.values()
+        for k in sd["actions"].keys()
+    }
+
+
+def regenerate(service_data, resource_only, resource_types):
+    """
+    (sorted resource-only actions, {action: resource types}) in service_data's
+    spelling, keeping actions it doesn't know as written
+    """
+    known = policyuniverse_actions(service_data)
+
+    def spell(action):
+        return known.get(action.lower(), action)
+
+    new_resource_only = {}
+    for action in sorted(resource_only):
+        new_resource_only.setdefault(action.lower(), spell(action))
+    names = {}
+    new_resource_types = {}
+    for action, types in sorted(resource_types.items()):
+        name = names.setdefault(action.lower(), spell(action))
+        merged = set(new_resource_types.get(name, [])) | set(types)
+        new_resource_types[name] = sorted(merged)
+    return sorted(new_resource_only.values()), new_resource_types
+
+
+def unknown_actions(service_data, resource_only, resource_types):
+    """sorted actions in either dataset that service_data doesn't list"""
+    known = policyuniverse_actions(service_data)
+    return sorted(
+        {
+            action
+            for action in list(resource_only) + list(resource_types)
+            if action.lower() not in known
+        }
+    )
+
+
+def dumps_resource_only(actions):
+    return json.dumps(sorted(actions), indent=2) + "\n"
+
+
+def dumps_resource_types(resource_types):
+    ordered = {
+        action: resource_types[action] for action in sorted(resource_types)
+    }
+    return json.dumps(ordered, indent=2) + "\n"
+
+
+def _changes(label, old, new):
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    lines = [f"{label}: {len(new)} (+{len(added)} -{len(removed)})"]
+    lines += [f"  + {action}" for action in added]
+    lines += [f"  - {action}" for action in removed]
+    return lines
+
+
+def diff_summary(service_data, old, new):
+    """
+    Lines summarizing the actions added to and removed from each dataset
+    between old and new (resource-only actions, resource types) pairs, and the
+    policyuniverse actions that have no resource data yet
+    """
+    old_resource_only, old_resource_types = old
+    new_resource_only, new_resource_types = new
+    lines = _changes(
+        "resource-only actions", old_resource_only, new_resource_only
+    )
+    lines += _changes(
+        "actions with resource types", old_resource_types, new_resource_types
+    )
+    changed = sorted(
+        action
+        for action in set(old_resource_types) & set(new_resource_types)
+        if old_resource_types[action] != new_resource_types[action]
+    )
+    lines += [f"  ~ {action}" for action in changed]
+    covered = {a.lower() for a in new_resource_only} | {
+        a.lower() for a in new_resource_types
+    }
+    missing = [
+        action
+        for key, action in policyuniverse_actions(service_data).items()
+        if key not in covered
+    ]
+    lines.append(
+        f"policyuniverse actions without resource data: {len(missing)}"
+    )
+    unknown = unknown_actions(service_data, *new)
+    lines.append(f"kept actions policyuniverse doesn't list: {len(unknown)}")
+    lines += [f"  ? {action}" for action in unknown]
+    return lines
+
+
+def main():
+    from cfn_mp_ql_rules import iam_data
+
+    parser = argparse.ArgumentParser(
+        description="Regenerate the IAM rules' datasets for the installed policyuniverse"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=iam_data.DATA_DIR,
+        help=f"directory holding the datasets (default {iam_data.DATA_DIR})",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report the changes, exiting 1 if there are any",
+    )
+    options = parser.parse_args()
+
+    paths = [
+        os.path.join(options.data_dir, name)
+        for name in [RESOURCE_ONLY_FILE, RESOURCE_TYPES_FILE]
+    ]
+    current = []
+    for path in paths:
+        with open(path) as f:
+            current.append(f.read())
+    old = (
+        read_resource_only(json.loads(current[0])),
+        read_resource_types(json.loads(current[1])),
+    )
+    service_data = iam_data.service_data()
+    new = regenerate(service_data, *old)
+    for line in diff_summary(service_data, old, new):
+        print(line, file=sys.stderr)
+    output = [dumps_resource_only(new[0]), dumps_resource_types(new[1])]
+    if options.check:
+        return 0 if output == current else 1
+    for path, text, old_text in zip(paths, output, current):
+        if text != old_text:
+            with open(path, "w") as f:
+                f.write(text)
+            print(f"wrote {path}: {len(text)} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
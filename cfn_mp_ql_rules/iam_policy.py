@@ -0,0 +1,89 @@
+"""
+A parsed view of a template's IAM policy statements, shared by the IAM rules.
+The model is built once per template from the template key index and
+memoized on the cfnlint Template, like the index itself.
+
+Any mapping with an Action, NotAction, Resource, NotResource or Principal key
+is treated as a statement, as the IAM rules always have, so properties such
+as AWS::Lambda::Permission's Principal are included.
+"""
+from cfn_mp_ql_rules.common import get_template_index
+
+STATEMENT_KEYS = [
+    "Action",
+    "NotAction",
+    "Resource",
+    "NotResource",
+    "Principal",
+]
+
+
+class Statement:
+    """One statement's elements, None where absent, and the path to it"""
+
+    __slots__ = (
+        "path",
+        "node",
+        "effect",
+        "action",
+        "not_action",
+        "resource",
+        "not_resource",
+        "principal",
+        "condition",
+    )
+
+    def __init__(self, path, node):
+        self.path = path
+        self.node = node
+        self.effect = node.get("Effect")
+        self.action = node.get("Action")
+        self.not_action = node.get("NotAction")
+        self.resource = node.get("Resource")
+        self.not_resource = node.get("NotResource")
+        self.principal = node.get("Principal")
+        self.condition = node.get("Condition")
+
+    def __repr__(self):
+        return f"Statement({self.path!r})"
+
+
+class PolicyModel:
+    """Every statement in a template, parsed once"""
+
+    def __init__(self, index):
+        self._by_path = {}
+        self._by_key = {}
+        for key in STATEMENT_KEYS:
+            found = []
+            for path, node in index.search_containers(key):
+                statement = self._by_path.get(tuple(path))
+                if statement is None:
+                    statement = Statement(path, node)
+                    self._by_path[tuple(path)] = statement
+                found.append(statement)
+            self._by_key[key] = found
+
+    def statements(self):
+        """every statement, each once"""
+        return list(self._by_path.values())
+
+    def with_key(self, key):
+        """statements containing key, in the order search_deep_keys finds it"""
+        return list(self._by_key[key])
+
+    def statement_at(self, path):
+        """the statement at path, or None"""
+        return self._by_path.get(tuple(path))
+
+
+def get_policy_model(cfn):
+    """
+    Returns the PolicyModel for a cfnlint Template, building it on first use.
+    The model is memoized on the Template object so all IAM rules share it.
+    """
+    model = getattr(cfn, "_cfn_mp_ql_rules_policy_model", None)
+    if model is None:
+        model = PolicyModel(get_template_index(cfn))
+        cfn._cfn_mp_ql_rules_policy_model = model
+    return model
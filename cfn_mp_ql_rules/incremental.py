@@ -0,0 +1,150 @@
+"""
+Selects the templates a git change affects, used by
+wrapped-cfn-lint --changed-since
+
+A template is selected if it changed since the merge base of the given ref
+and HEAD, or if it is the direct parent or child, through an
+AWS::CloudFormation::Stack TemplateURL, of a template that changed.
+"""
+import os
+import subprocess
+import cfnlint.core
+import cfnlint.decode
+from cfn_mp_ql_rules.stack.StackHelper import template_url_to_path
+
+STACK_TYPE = b"AWS::CloudFormation::Stack"
+
+
+def _git(args, cwd):
+    try:
+        proc = subprocess.run(
+            ["git"] + args,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        raise cfnlint.core.CfnLintExitException(
+            f"git {args[0]} failed: {stderr.decode(errors='replace').strip() or e}",
+            1,
+        ) from e
+    return proc.stdout
+
+
+def _paths(output):
+    return [p.decode() for p in output.split(b"\0") if p]
+
+
+def changed_files(base_ref, cwd="."):
+    """
+    ({changed or added paths}, {deleted paths}) in the working tree since the
+    merge base of base_ref and HEAD, as real paths. Untracked files that
+    aren't ignored count as added.
+    """
+    root = _git(["rev-parse", "--show-toplevel"], cwd).decode().strip()
+    merge_base = _git(["merge-base", base_ref, "HEAD"], cwd).decode().strip()
+    # diff-index compares against the index's stat data, refresh it first
+    subprocess.run(
+        ["git", "update-index", "-q", "--refresh"],
+        cwd=root,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False,
+    )
+    diff = _paths(
+        _git(
+            ["diff-index", "--name-status", "--no-renames", "-z", merge_base],
+            root,
+        )
+    )
+    changed = set()
+    deleted = set()
+    for status, path in zip(diff[::2], diff[1::2]):
+        path = os.path.realpath(os.path.join(root, path))
+        (deleted if status == "D" else changed).add(path)
+    for path in _paths(
+        _git(["ls-files", "--others", "--exclude-standard", "-z"], root)
+    ):
+        changed.add(os.path.realpath(os.path.join(root, path)))
+    return changed, deleted
+
+
+def nested_stack_children(filename, template):
+    """
+    Local paths of the child templates filename's stacks point to, the
+    files the stack rules read while linting it. Returns None if a child
+    can't be resolved.
+    """
+    children = []
+    if not isinstance(template, dict):
+        return children
+    resources = template.get("Resources", {})
+    if not isinstance(resources, dict):
+        return children
+    for resource in resources.values():
+        if not isinstance(resource, dict):
+            continue
+        if resource.get("Type") != "AWS::CloudFormation::Stack":
+            continue
+        properties = resource.get("Properties")
+        if not isinstance(properties, dict):
+            properties = {}
+        template_url = properties.get("TemplateURL")
+        try:
+            children.extend(
+                template_url_to_path(
+                    current_template_path=os.path.abspath(filename),
+                    template_url=template_url,
+                    template_mappings=template.get("Mappings"),
+                )
+            )
+        except Exception:  # pylint: disable=broad-except
+            return None
+    return children
+
+
+def _has_stacks(filename):
+    try:
+        with open(filename, "rb") as f:
+            return STACK_TYPE in f.read()
+    except OSError:
+        return False
+
+
+def select_templates(filenames, base_ref, cwd="."):
+    """
+    The filenames, in their original order, that changed since base_ref or
+    are a parent or child of one that did. None (stdin) is always kept.
+    """
+    changed, deleted = changed_files(base_ref, cwd)
+    real = {
+        filename: os.path.realpath(filename)
+        for filename in filenames
+        if filename is not None
+    }
+    selected = {path for path in real.values() if path in changed}
+    for filename, path in real.items():
+        if not _has_stacks(filename):
+            continue
+        (template, errors) = cfnlint.decode.decode(filename)
+        if errors:
+            continue
+        children = nested_stack_children(filename, template)
+        if children is None:
+            # a deleted file may be what no longer resolves
+            if deleted:
+                selected.add(path)
+            continue
+        children = {os.path.realpath(child) for child in children}
+        if path in changed:
+            selected.update(children)
+        elif children & (changed | deleted):
+            selected.add(path)
+    return [
+        filename
+        for filename in filenames
+        if filename is None or real[filename] in selected
+    ]
@@ -0,0 +1,315 @@
+"""
+Long-lived wrapped-cfn-lint server, and the thin client that talks to it.
+
+The server keeps cfn-lint, the rules collection and the rule data loaded
+and answers lint requests over a Unix domain socket. Each request carries
+the client's argv, working directory and AWS region environment; the
+response carries the stdout, stderr and exit code wrapped-cfn-lint would
+have produced. Requests that would load a different set of rules than the
+server has, through -a/--append-rules or -z/--custom-rules, are declined and
+linted by the client in its own process.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from cfn_mp_ql_rules.result_cache import directory_digest
+
+# cfn-lint and the rules are only imported by the server, keeping the client fast to start
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+CONNECT_TIMEOUT = 30
+CONFIG_FILE_NAMES = [".cfnlintrc", ".cfnlintrc.yaml", ".cfnlintrc.yml"]
+FORWARDED_ENV = ["AWS_REGION", "AWS_DEFAULT_REGION"]
+
+
+def rule_loading_args(args):
+    """
+    The cfn-lint arguments that decide which rules are loaded. cfn-lint
+    keeps the rules it first loads for the life of the process, only
+    reconfiguring them (--include-experimental, --include-checks and so on)
+    per template.
+    """
+
+    def _path(location):
+        if location and os.path.exists(os.path.expanduser(location)):
+            return os.path.abspath(os.path.expanduser(location))
+        return location
+
+    return [[_path(r) for r in args.append_rules], _path(args.custom_rules)]
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"cfn-mp-ql-rules-{os.getuid()}.sock")
+
+
+def _recv_all(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _send_message(conn, message):
+    conn.sendall(json.dumps(message).encode())
+    conn.shutdown(socket.SHUT_WR)
+
+
+class LintServer:
+    """Serves wrapped-cfn-lint requests until idle for idle_timeout seconds"""
+
+    def __init__(self, socket_path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        from cfn_mp_ql_rules import cfnlint_exit_code_wrapper
+
+        self.wrapper = cfnlint_exit_code_wrapper
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.rule_location = cfnlint_exit_code_wrapper.RULE_LOCATION
+        self._rule_digest = None
+        self._rule_args = None
+        self._config_stats = {}
+
+    def warm(self):
+        """Load cfn-lint's rules collection, and the rule data it uses"""
+        import cfnlint.config
+        from cfn_mp_ql_rules import iam_data, spelling
+
+        self._rule_digest = directory_digest(self.rule_location)
+        args = cfnlint.config.ConfigMixIn([f"-a={self.rule_location}"])
+        self._rule_args = rule_loading_args(args)
+        self.wrapper.get_rules(args)
+        iam_data.load_all()
+        spelling.load_all()
+
+    @staticmethod
+    def config_stats(cwd):
+        config_files = [Path.home().joinpath(".cfnlintrc")] + [
+            Path(cwd).joinpath(name) for name in CONFIG_FILE_NAMES
+        ]
+        stats = []
+        for config_file in config_files:
+            try:
+                st = config_file.stat()
+            except OSError:
+                continue
+            stats.append([str(config_file), st.st_mtime_ns, st.st_size])
+        return stats
+
+    def needs_reload(self, cwd):
+        """
+        True once the rule pack, or a cfn-lint config file that applies to
+        cwd, has changed since it was first loaded
+        """
+        if directory_digest(self.rule_location) != self._rule_digest:
+            return True
+        stats = self.config_stats(cwd)
+        return self._config_stats.setdefault(cwd, stats) != stats
+
+    def loads_other_rules(self, argv):
+        """True if argv, in the current directory, asks for other rules"""
+        import cfnlint.config
+
+        _, cfnlint_argv = self.wrapper.wrapper_arg_parser().parse_known_args(
+            argv
+        )
+        args = cfnlint.config.ConfigMixIn(
+            [f"-a={self.rule_location}"] + cfnlint_argv
+        )
+        return rule_loading_args(args) != self._rule_args
+
+    def handle(self, request):
+        if self.needs_reload(request["cwd"]):
+            return {"reload": True}
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        saved_cwd = os.getcwd()
+        saved_env = {k: os.environ.get(k) for k in FORWARDED_ENV}
+        saved_stdin = sys.stdin
+        try:
+            os.chdir(request["cwd"])
+            for k in FORWARDED_ENV:
+                if request["env"].get(k) is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = request["env"][k]
+            # templates have to be passed as arguments, stdin is not forwarded
+            sys.stdin = open(os.devnull)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+                stderr
+            ):
+                try:
+                    if self.loads_other_rules(request["argv"]):
+                        return {"fallback": True}
+                    exit_code = self.wrapper.wrapped_main(
+                        request["argv"], in_process=True
+                    )
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else 1
+        finally:
+            sys.stdin.close()
+            sys.stdin = saved_stdin
+            os.chdir(saved_cwd)
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+        return {
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "exit_code": exit_code,
+        }
+
+    def _bind(self):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen()
+        listener.settimeout(self.idle_timeout)
+        return listener
+
+    def serve(self):
+        """Returns True if the server should be restarted to pick up changes"""
+        self.warm()
+        listener = self._bind()
+        try:
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    return False
+                with conn:
+                    conn.settimeout(None)
+                    try:
+                        request = json.loads(_recv_all(conn))
+                        response = self.handle(request)
+                    except Exception as e:  # pylint: disable=broad-except
+                        response = {
+                            "stdout": "",
+                            "stderr": f"{e}\n",
+                            "exit_code": 1,
+                        }
+                    with contextlib.suppress(OSError):
+                        _send_message(conn, response)
+                    if response.get("reload"):
+                        return True
+        finally:
+            listener.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+
+
+def server_main():
+    parser = argparse.ArgumentParser(
+        description="Serve wrapped-cfn-lint requests over a Unix domain socket"
+    )
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument(
+        "--idle-timeout",
+        type=int,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="exit after this many seconds without a request",
+    )
+    args = parser.parse_args()
+    restart = LintServer(args.socket, args.idle_timeout).serve()
+    if restart:
+        # a fresh interpreter is the only reliable way to reload the rule modules
+        os.execv(
+            sys.executable,
+            [sys.executable, "-m", "cfn_mp_ql_rules.lint_server"]
+            + sys.argv[1:],
+        )
+
+
+def start_server(socket_path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            "-m",
+            "cfn_mp_ql_rules.lint_server",
+            "--socket",
+            socket_path,
+            "--idle-timeout",
+            str(idle_timeout),
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def request(socket_path, argv, timeout=CONNECT_TIMEOUT, start=True):
+    """
+    Sends a lint request, starting the server if it isn't running.
+    Returns the response dict, or None if no server could be reached. A
+    response with "fallback" set means the server declined the request.
+    """
+    message = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": {k: os.environ.get(k) for k in FORWARDED_ENV},
+    }
+    deadline = time.monotonic() + timeout
+    started = False
+    while time.monotonic() < deadline:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.connect(socket_path)
+                _send_message(conn, message)
+                response = json.loads(_recv_all(conn))
+        except (FileNotFoundError, ConnectionRefusedError):
+            if not start:
+                return None
+            if not started:
+                start_server(socket_path)
+                started = True
+            time.sleep(0.1)
+            continue
+        except (ConnectionResetError, BrokenPipeError, ValueError):
+            # the server shut down or restarted mid-request
+            time.sleep(0.1)
+            continue
+        if response.get("reload"):
+            started = True
+            time.sleep(0.1)
+            continue
+        return response
+    return None
+
+
+def client_main():
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--no-start", action="store_true")
+    client_args, argv = parser.parse_known_args(sys.argv[1:])
+    response = request(client_args.socket, argv, start=not client_args.no_start)
+    if response is None or response.get("fallback"):
+        # no server, or one with other rules loaded: lint in this process
+        from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import wrapped_main
+
+        sys.exit(wrapped_main(argv))
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
+
+
+if __name__ == "__main__":
+    server_main()
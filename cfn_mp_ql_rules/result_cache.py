@@ -0,0 +1,170 @@
+"""
+Content-addressed on-disk cache of cfn-lint results, used by wrapped-cfn-lint
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+DEFAULT_MAX_SIZE_MB = 256
+ENTRY_SUFFIX = ".json"
+
+
+def cache_dir():
+    """the user's cache directory for this package"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "cfn-mp-ql-rules")
+
+
+def file_digest(path):
+    """sha256 of a file's bytes, None if it can't be read"""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def file_stamp(path):
+    """a file's size and modification time, None if it can't be read"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def directory_digest(path, extensions=(".py", ".json", ".txt")):
+    """sha256 over the relative names and contents of every matching file under path"""
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(extensions):
+                continue
+            full_path = os.path.join(root, name)
+            h.update(os.path.relpath(full_path, path).encode())
+            h.update((file_digest(full_path) or "").encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Stores one JSON entry per cache key in cache_dir.
+    Entries are evicted least-recently-used first once the directory grows
+    past max_size bytes; a cache hit refreshes the entry's mtime.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE_MB * 1024 * 1024):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._size = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        h = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, str):
+                part = json.dumps(part, sort_keys=True, default=str)
+            h.update(part.encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """
+        Returns the stored entry, or None on a miss.
+        An entry is only a hit if every file it depends on still has the
+        digest recorded when it was stored.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        for dep_path, dep_digest in entry.get("dependencies", []):
+            if file_digest(dep_path) != dep_digest:
+                self.misses += 1
+                return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """Atomically write an entry, then evict if the cache is over size"""
+        data = json.dumps(entry, default=str)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.stores += 1
+        if self._size is None:
+            self.evict()
+        else:
+            # overwritten entries are double counted until the next evict() rescan
+            self._size += len(data)
+            if self._size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        for _, size, name in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (
+            f"cache: {s['hits']} hits, {s['misses']} misses "
+            f"({s['hit_rate']:.1%} hit rate), {s['stores']} stored, "
+            f"{s['evictions']} evicted"
+        )
@@ -0,0 +1,173 @@
+"""
+Per-rule timing, allocation and match-count instrumentation, used by
+wrapped-cfn-lint --rule-timings
+"""
+import functools
+import json
+import os
+import time
+import tracemalloc
+from cfn_mp_ql_rules import iam_data, spelling
+
+INSTRUMENTED_METHODS = ["match", "determine_changes"]
+STAT_FIELDS = ["calls", "wall_time", "cpu_time", "peak_alloc", "matches"]
+
+
+def defined_under(func, location):
+    """True if func's code was compiled from a file under location"""
+    # cfn-lint imports rule files without adding them to sys.modules,
+    # so go by the code object rather than the module
+    code = getattr(getattr(func, "__func__", func), "__code__", None)
+    if code is None:
+        return False
+    path = os.path.abspath(code.co_filename)
+    return path.startswith(os.path.abspath(location) + os.sep)
+
+
+def process_cache_stats():
+    """{cache name: counts} for every process-wide rule cache"""
+    return {**iam_data.cache_stats(), **spelling.cache_stats()}
+
+
+def _new_stats():
+    return dict.fromkeys(STAT_FIELDS, 0)
+
+
+def _add_stats(total, stats):
+    for field in STAT_FIELDS:
+        if field == "peak_alloc":
+            total[field] = max(total[field], stats[field])
+        else:
+            total[field] += stats[field]
+
+
+class RuleTimings:
+    """
+    Wraps the match() and determine_changes() methods of every rule loaded
+    from rule_location, recording per rule id and per template:
+    calls, wall and CPU time in seconds, the peak bytes allocated above the
+    level at the start of a call, and the number of matches returned.
+    """
+
+    def __init__(self, rule_location):
+        self.rule_location = os.path.abspath(rule_location)
+        # {template: {rule_id: {method: stats}}}
+        self.templates = {}
+        self._instrumented = []
+        # absolute tracemalloc peaks of the calls currently on the stack
+        self._peaks = []
+        self._started_tracemalloc = False
+        self._cache_stats_start = {}
+
+    def instrument(self, rules):
+        """Wrap the rules in a cfn-lint RulesCollection, in place"""
+        self._cache_stats_start = process_cache_stats()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        for rule in rules.all_rules.values():
+            for method in INSTRUMENTED_METHODS:
+                func = getattr(rule, method, None)
+                if not callable(func) or method in vars(rule):
+                    continue
+                if not defined_under(func, self.rule_location):
+                    continue
+                setattr(rule, method, self._wrap(rule.id, method, func))
+                self._instrumented.append((rule, method))
+
+    def uninstrument(self):
+        """Restore the rules' own methods"""
+        for rule, method in self._instrumented:
+            vars(rule).pop(method, None)
+        self._instrumented = []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _wrap(self, rule_id, method, func):
+        @functools.wraps(func)
+        def wrapper(cfn, *args, **kwargs):
+            start_alloc = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self._peaks.append(start_alloc)
+            start_cpu = time.process_time()
+            start_wall = time.perf_counter()
+            try:
+                result = func(cfn, *args, **kwargs)
+            finally:
+                wall_time = time.perf_counter() - start_wall
+                cpu_time = time.process_time() - start_cpu
+                # a nested instrumented call resets the peak, so take the
+                # larger of what it saw and what has been seen since
+                peak = max(
+                    self._peaks.pop(), tracemalloc.get_traced_memory()[1]
+                )
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+            if result is not None and not isinstance(result, list):
+                result = list(result)
+            template = getattr(cfn, "filename", None)
+            stats = self._stats(template, rule_id, method)
+            stats["calls"] += 1
+            stats["wall_time"] += wall_time
+            stats["cpu_time"] += cpu_time
+            stats["peak_alloc"] = max(stats["peak_alloc"], peak - start_alloc)
+            stats["matches"] += len(result or [])
+            return result
+
+        return wrapper
+
+    def _stats(self, template, rule_id, method):
+        rule_stats = self.templates.setdefault(template or "-", {})
+        method_stats = rule_stats.setdefault(rule_id, {})
+        return method_stats.setdefault(method, _new_stats())
+
+    def rule_totals(self):
+        """{rule_id: {method: stats}} summed over every template"""
+        totals = {}
+        for rule_stats in self.templates.values():
+            for rule_id, methods in rule_stats.items():
+                for method, stats in methods.items():
+                    _add_stats(
+                        totals.setdefault(rule_id, {}).setdefault(
+                            method, _new_stats()
+                        ),
+                        stats,
+                    )
+        return totals
+
+    def cache_stats(self):
+        """hits and misses of the process-wide rule caches since instrument()"""
+        stats = {}
+        for name, counts in process_cache_stats().items():
+            start = self._cache_stats_start.get(name, {})
+            hits = counts["hits"] - start.get("hits", 0)
+            misses = counts["misses"] - start.get("misses", 0)
+            stats[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": (hits / (hits + misses)) if hits + misses else 0.0,
+                "size": counts["size"],
+                "max_size": counts["max_size"],
+            }
+        return stats
+
+    def report(self):
+        totals = self.rule_totals()
+        return {
+            "rules": dict(
+                sorted(
+                    totals.items(),
+                    key=lambda item: -sum(
+                        s["wall_time"] for s in item[1].values()
+                    ),
+                )
+            ),
+            "templates": self.templates,
+            "caches": self.cache_stats(),
+        }
+
+    def write_report(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
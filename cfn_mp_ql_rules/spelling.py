@@ -0,0 +1,303 @@
+"""
+Spelling data used by SentenceCase. pyspellchecker's word-frequency
+dictionary and the custom dictionary are loaded once per process, on first
+use, so templates after the first (and templates that aren't entry points)
+don't pay for them.
+
+Spelling verdicts are kept in memory for the life of the process. Setting
+CFN_MP_QL_RULES_SPELLING_CACHE=1 also keeps them in an on-disk cache in the
+user's cache directory, keyed by word and dictionary version, so a word is
+only looked up in pyspellchecker's dictionary the first time any run sees it.
+The file holds at most MAX_VERDICTS words, the oldest being dropped first.
+
+Setting CFN_MP_QL_RULES_SPELLING=symspell looks words up in a symmetric
+delete index (see spelling_index) instead of pyspellchecker. The index is
+read from the package's data directory if it was built for the installed
+dictionaries, otherwise it is built once into the user's cache directory.
+"""
+import functools
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import tempfile
+from cfn_mp_ql_rules import spelling_index
+from cfn_mp_ql_rules.result_cache import cache_dir, file_digest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CUSTOM_DICT_FILE = os.path.join(DATA_DIR, "custom_dict.txt")
+LANGUAGE = "en"
+VERDICT_FORMAT_VERSION = 1
+PACKAGED_INDEX = os.path.join(DATA_DIR, "spelling_index.bin")
+BACKEND_ENV = "CFN_MP_QL_RULES_SPELLING"
+BACKENDS = ["pyspellchecker", "symspell"]
+VERDICT_CACHE_ENV = "CFN_MP_QL_RULES_SPELLING_CACHE"
+MAX_VERDICTS = 50000
+
+
+def read_custom_dict(path=CUSTOM_DICT_FILE):
+    """set of the words in a custom dictionary file, one per line"""
+    with open(path, "r") as f:
+        return set(l.replace("\n", "") for l in f.readlines())
+
+
+@functools.lru_cache(maxsize=None)
+def custom_dict():
+    """frozen set of the words in data/custom_dict.txt"""
+    return frozenset(read_custom_dict())
+
+
+@functools.lru_cache(maxsize=None)
+def spell_checker():
+    """The process-wide SpellChecker. Callers must not add words to it."""
+    from spellchecker import SpellChecker
+
+    return SpellChecker(language=LANGUAGE)
+
+
+def proper_nouns(extra=()):
+    """
+    Frozen set of the custom dictionary plus extra words, such as a template's
+    LintSpellExclude, leaving the shared custom dictionary unchanged
+    """
+    words = custom_dict()
+    if not extra:
+        return words
+    return words.union(extra)
+
+
+def _dictionary_path():
+    # pyspellchecker's word-frequency file, found without importing it
+    spec = importlib.util.find_spec("spellchecker")
+    return os.path.join(
+        os.path.dirname(spec.origin), "resources", f"{LANGUAGE}.json.gz"
+    )
+
+
+def backend_name():
+    """The spelling backend $CFN_MP_QL_RULES_SPELLING selects"""
+    name = os.environ.get(BACKEND_ENV) or BACKENDS[0]
+    if name not in BACKENDS:
+        raise ValueError(
+            f"{BACKEND_ENV} must be one of {', '.join(BACKENDS)}, not {name}"
+        )
+    return name
+
+
+def backend():
+    """The selected backend, anything with SpellChecker's unknown() and correction()"""
+    if backend_name() == "symspell":
+        return index()
+    return spell_checker()
+
+
+@functools.lru_cache(maxsize=None)
+def dictionary_version():
+    """
+    sha256 over the verdict format, the backend, pyspellchecker's version and
+    its dictionary, and the custom dictionary for symspell, whose index
+    offers its words as corrections
+    """
+    h = hashlib.sha256(str(VERDICT_FORMAT_VERSION).encode())
+    name = backend_name()
+    h.update(name.encode())
+    h.update(importlib.metadata.version("pyspellchecker").encode())
+    h.update((file_digest(_dictionary_path()) or "").encode())
+    if name == "symspell":
+        h.update((file_digest(CUSTOM_DICT_FILE) or "").encode())
+    return h.hexdigest()
+
+
+def index_digest():
+    """sha256 over the index format and every file it is built from"""
+    h = hashlib.sha256(str(spelling_index.FORMAT_VERSION).encode())
+    h.update(importlib.metadata.version("pyspellchecker").encode())
+    for path in [_dictionary_path(), CUSTOM_DICT_FILE]:
+        h.update((file_digest(path) or "").encode())
+    return h.hexdigest()
+
+
+def build_index(digest):
+    return spelling_index.build_index(
+        digest,
+        spell_checker().word_frequency.dictionary,
+        custom_dict(),
+    )
+
+
+def write_index(path, digest=None):
+    """Atomically build the index for the installed dictionaries into path"""
+    data = build_index(digest or index_digest())
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return data
+
+
+def _open_index(path, digest):
+    try:
+        found = spelling_index.SpellingIndex.open(path)
+    except (OSError, ValueError, spelling_index.SpellingIndexError):
+        return None
+    if found.digest != digest:
+        return None
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def index():
+    """The SpellingIndex for the installed dictionaries"""
+    digest = index_digest()
+    cached = os.path.join(cache_dir(), f"spelling_index-{digest[:16]}.bin")
+    for path in [PACKAGED_INDEX, cached]:
+        found = _open_index(path, digest)
+        if found is not None:
+            return found
+    try:
+        write_index(cached, digest)
+    except OSError:
+        # no writable cache, keep this process's copy in memory
+        return spelling_index.SpellingIndex(build_index(digest))
+    return spelling_index.SpellingIndex.open(cached)
+
+
+class VerdictCache:
+    """
+    Known/unknown verdicts, and the top suggestion for unknown words, for the
+    lower case words pyspellchecker has been asked about. Each verdict is
+    [known] or [known, suggestion]. unknown() answers like
+    SpellChecker.unknown, only asking pyspellchecker about words it has no
+    verdict for. save() merges new verdicts into the file at path and
+    atomically replaces it, so concurrent workers never see a partial file;
+    at worst a verdict written by one of them is looked up again later. The
+    file keeps the max_size most recently added words. With no path the
+    verdicts are only kept in memory.
+    """
+
+    def __init__(self, path, version, spell=backend, max_size=MAX_VERDICTS):
+        self.path = path
+        self.version = version
+        self.max_size = max_size
+        self._spell = spell
+        self._verdicts = self._read()
+        self._new = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self):
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        return data.get("words", {})
+
+    def __len__(self):
+        return len(self._verdicts)
+
+    def _store(self, word, verdict):
+        self._new[word] = self._verdicts[word] = verdict
+
+    def unknown(self, words):
+        """lower case words pyspellchecker doesn't know, as SpellChecker.unknown"""
+        words = {w.lower() for w in words}
+        missing = [w for w in words if w not in self._verdicts]
+        self.hits += len(words) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            unknown = self._spell().unknown(missing)
+            for word in missing:
+                self._store(word, [word not in unknown])
+        return {w for w in words if not self._verdicts[w][0]}
+
+    def suggestion(self, word):
+        """
+        pyspellchecker's top correction for an unknown word, None if the word
+        is known or has none. Corrections are slow to find, so they're only
+        looked up, and cached, when asked for.
+        """
+        word = word.lower()
+        if word not in self.unknown([word]):
+            return None
+        verdict = self._verdicts[word]
+        if len(verdict) < 2:
+            verdict = [False, self._spell().correction(word)]
+            self._store(word, verdict)
+        return verdict[1]
+
+    def save(self):
+        """Write verdicts found since the last save, if any, to path"""
+        if not self._new or self.path is None:
+            self._new = {}
+            return
+        words = self._read()
+        for word, verdict in self._new.items():
+            # keep a suggestion another worker found
+            if len(verdict) >= len(words.get(word, [])):
+                words.pop(word, None)
+                words[word] = verdict
+        if len(words) > self.max_size:
+            # words are in the order they were added, so the oldest go first
+            words = dict(list(words.items())[-self.max_size :])
+        data = json.dumps({"version": self.version, "words": words})
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError:
+            # no writable cache, keep this process's verdicts in memory
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._verdicts.update(words)
+        self._new = {}
+
+
+@functools.lru_cache(maxsize=None)
+def verdicts():
+    """
+    The VerdictCache for the installed dictionary, on disk if
+    $CFN_MP_QL_RULES_SPELLING_CACHE is 1
+    """
+    version = dictionary_version()
+    path = None
+    if os.environ.get(VERDICT_CACHE_ENV) == "1":
+        path = os.path.join(cache_dir(), f"spelling-{version[:16]}.json")
+    return VerdictCache(path, version)
+
+
+def cache_stats():
+    """{cache name: counts} for the spelling verdict cache"""
+    counts = {"hits": 0, "misses": 0, "size": 0, "max_size": None}
+    if verdicts.cache_info().currsize:
+        cache = verdicts()
+        counts.update(hits=cache.hits, misses=cache.misses, size=len(cache))
+        if cache.path is not None:
+            counts["max_size"] = cache.max_size
+    return {"spelling_verdicts": counts}
+
+
+def load_all():
+    """Load the spelling data now, for long-lived processes"""
+    custom_dict()
+    backend()
+    verdicts()
@@ -0,0 +1,329 @@
+"""
+Symmetric delete spelling index (as in SymSpell), queried through mmap.
+
+The index holds pyspellchecker's word-frequency dictionary plus the words of
+data/custom_dict.txt. Custom words are only suggested: they have a frequency
+of 0 and aren't known, so verdicts are the same as pyspellchecker's (the
+rules strip custom words before spell checking anyway). Every word is indexed under each string that deleting
+up to MAX_DISTANCE characters from its first PREFIX_LENGTH characters gives,
+so a lookup only generates the deletes of the misspelling, rather than every
+edit of it, and checks the few words sharing one of them. All integers are
+little-endian; every section starts on a 4 byte boundary.
+
+  header       magic, format version, word count, bucket count, max
+               distance, prefix length, longest word length, sha256 of the
+               sources, then the offset of each section
+  words        u32 offsets (count + 1) into a utf-8 blob of the sorted lower
+               case words, each followed by a newline
+  frequencies  u32 per word, 0 for custom words
+  buckets      u32 offsets (bucket count + 1) into the word ids, one run
+               per crc32 of a delete, modulo the bucket count
+  word ids     u32 per (delete, word) pair
+
+Usage: python -m cfn_mp_ql_rules.spelling_index [--output PATH]
+"""
+import argparse
+import array
+import mmap
+import os
+import string
+import struct
+import sys
+import zlib
+
+MAGIC = b"CFNMPSPL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIII32s5I")
+U32 = struct.Struct("<I")
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+MAX_FREQUENCY = 0xFFFFFFFF
+
+
+class SpellingIndexError(Exception):
+    pass
+
+
+def _align(buf):
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def _hash(delete):
+    return zlib.crc32(delete.encode())
+
+
+def deletes(word, max_distance=MAX_DISTANCE, prefix_length=PREFIX_LENGTH):
+    """word's prefix and every string deleting up to max_distance characters from it gives"""
+    found = {word[:prefix_length]}
+    edges = found
+    for _ in range(max_distance):
+        edges = {
+            w[:i] + w[i + 1 :] for w in edges for i in range(len(w))
+        } - found
+        found |= edges
+    return found
+
+
+def build_index(digest, frequencies, custom_words=()):
+    """
+    Returns the index bytes for {word: frequency}, such as pyspellchecker's
+    word_frequency.dictionary, plus custom_words, which are added with a
+    frequency of 0 unless the dictionary has them
+    """
+    words = {w.lower(): min(f, MAX_FREQUENCY) for w, f in frequencies.items()}
+    for w in custom_words:
+        words.setdefault(w.lower(), 0)
+    keys = sorted(words)
+    pair_hashes = array.array("I")
+    pair_ids = array.array("I")
+    for word_id, key in enumerate(keys):
+        for delete in deletes(key):
+            pair_hashes.append(_hash(delete))
+            pair_ids.append(word_id)
+    # a power of two buckets, about one per two (delete, word) pairs
+    bucket_count = 1 << max(len(pair_ids) // 2, 1).bit_length()
+    mask = bucket_count - 1
+    pair_buckets = array.array("I", (h & mask for h in pair_hashes))
+    del pair_hashes
+
+    # counting sort of the word ids by bucket
+    bucket_offsets = array.array("I", bytes(4 * (bucket_count + 1)))
+    for b in pair_buckets:
+        bucket_offsets[b + 1] += 1
+    for b in range(bucket_count):
+        bucket_offsets[b + 1] += bucket_offsets[b]
+    fill = array.array("I", bucket_offsets[:-1])
+    ids = array.array("I", bytes(4 * len(pair_ids)))
+    for b, word_id in zip(pair_buckets, pair_ids):
+        ids[fill[b]] = word_id
+        fill[b] += 1
+
+    word_offsets = bytearray()
+    blob = bytearray()
+    for key in keys:
+        word_offsets += U32.pack(len(blob))
+        blob += key.encode() + b"\n"
+    word_offsets += U32.pack(len(blob))
+    sections = [
+        word_offsets,
+        blob,
+        _le_bytes(array.array("I", (words[key] for key in keys))),
+        _le_bytes(bucket_offsets),
+        _le_bytes(ids),
+    ]
+    body = bytearray()
+    offsets = []
+    for section in sections:
+        _align(body)
+        offsets.append(HEADER.size + len(body))
+        body += section
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(keys),
+        bucket_count,
+        MAX_DISTANCE,
+        PREFIX_LENGTH,
+        max((len(key) for key in keys), default=0),
+        bytes.fromhex(digest),
+        *offsets,
+    )
+    return header + bytes(body)
+
+
+def _le_bytes(values):
+    if sys.byteorder != "little":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def distance(a, b, limit):
+    """
+    Damerau-Levenshtein distance between a and b, with transpositions of
+    adjacent characters that later edits may touch, as pyspellchecker's
+    repeated edits give; limit + 1 if it's over limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Lowrance-Wagner: d[i][j] for a[:i] and b[:j], offset by one row and
+    # column of "infinity" for the transposition lookback
+    inf = len(a) + len(b)
+    last_row = {}
+    d = [[inf] * (len(b) + 2)]
+    d += [[inf] + list(range(len(b) + 1))]
+    for i in range(1, len(a) + 1):
+        d.append([inf, i] + [0] * len(b))
+        last_col = 0
+        for j in range(1, len(b) + 1):
+            i1 = last_row.get(b[j - 1], 0)
+            j1 = last_col
+            cost = 1
+            if a[i - 1] == b[j - 1]:
+                cost = 0
+                last_col = j
+            d[i + 1][j + 1] = min(
+                d[i][j] + cost,
+                d[i + 1][j] + 1,
+                d[i][j + 1] + 1,
+                d[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1),
+            )
+        last_row[a[i - 1]] = i
+    return min(d[len(a) + 1][len(b) + 1], limit + 1)
+
+
+class SpellingIndex:
+    """
+    Lookups over an index's bytes, an mmap or anything else buffer-like.
+    unknown() and correction() answer as pyspellchecker's SpellChecker does
+    for its default distance of 2.
+    """
+
+    def __init__(self, buf):
+        if len(buf) < HEADER.size:
+            raise SpellingIndexError("truncated header")
+        (
+            magic,
+            version,
+            self.count,
+            self.bucket_count,
+            self.max_distance,
+            self.prefix_length,
+            self.longest_word_length,
+            digest,
+            word_offsets,
+            self._words,
+            frequencies,
+            bucket_offsets,
+            ids,
+        ) = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SpellingIndexError(
+                f"not a version {FORMAT_VERSION} spelling index"
+            )
+        self.digest = digest.hex()
+        self._buf = buf
+        self._mask = self.bucket_count - 1
+        self._word_offsets = self._array("I", word_offsets, self.count + 1)
+        self._frequencies_array = self._array("I", frequencies, self.count)
+        self._bucket_offsets = self._array(
+            "I", bucket_offsets, self.bucket_count + 1
+        )
+        self._ids = self._array("I", ids, self._bucket_offsets[-1])
+        self._by_word = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _array(self, typecode, offset, count):
+        """count integers from offset, without copying them where possible"""
+        view = memoryview(self._buf)[offset:]
+        view = view[: count * array.array(typecode).itemsize]
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        values = array.array(typecode, view)
+        values.byteswap()
+        return values
+
+    def word(self, idx):
+        start = self._words + self._word_offsets[idx]
+        end = self._words + self._word_offsets[idx + 1] - 1
+        return self._buf[start:end].decode()
+
+    def _frequencies(self):
+        # {word: frequency}, decoded on first use; a dict lookup is several
+        # times faster than a binary search over the mapped bytes
+        if self._by_word is None:
+            blob = self._buf[self._words : self._words + self._word_offsets[-1]]
+            self._by_word = dict(
+                zip(blob.decode().split("\n"), self._frequencies_array)
+            )
+        return self._by_word
+
+    def frequency(self, word):
+        """word's frequency, 0 if it's unknown or only in the custom dictionary"""
+        return self._frequencies().get(word.lower(), 0)
+
+    def _should_check(self, word):
+        # as SpellChecker._check_if_should_check
+        if len(word) == 1 and word in string.punctuation:
+            return False
+        if len(word) > self.longest_word_length + 3:
+            return False
+        if word.lower() in ("nan", "inf", "infinity"):
+            return True
+        try:
+            float(word)
+            return False
+        except ValueError:
+            return True
+
+    def unknown(self, words):
+        """lower case words that aren't in the dictionary, as SpellChecker.unknown"""
+        frequencies = self._frequencies()
+        words = [w.lower() for w in words if self._should_check(w)]
+        return {w for w in words if not frequencies.get(w)}
+
+    def candidates(self, word):
+        """
+        The indexed words nearest word, within max_distance edits, as
+        SpellChecker.candidates, or None if there are none
+        """
+        if not self._should_check(word) or self.frequency(word):
+            return {word}
+        word = word.lower()
+        best, found = self.max_distance, set()
+        seen = set()
+        for delete in deletes(word, self.max_distance, self.prefix_length):
+            b = _hash(delete) & self._mask
+            seen.update(
+                self._ids[self._bucket_offsets[b] : self._bucket_offsets[b + 1]]
+            )
+        for idx in seen:
+            candidate = self.word(idx)
+            if candidate == word or not self._should_check(candidate):
+                continue
+            d = distance(word, candidate, best)
+            if d > best:
+                continue
+            if d < best:
+                best, found = d, set()
+            found.add(candidate)
+        return found or None
+
+    def correction(self, word):
+        """The most frequent of the nearest candidates, None if there are none"""
+        candidates = self.candidates(word)
+        if not candidates:
+            return None
+        # ties go to the first word alphabetically, rather than set order
+        return max(sorted(candidates), key=self.frequency)
+
+
+def main():
+    from cfn_mp_ql_rules import spelling
+
+    parser = argparse.ArgumentParser(
+        description="Build the spelling index the symspell backend reads"
+    )
+    parser.add_argument(
+        "--output",
+        default=spelling.PACKAGED_INDEX,
+        help=f"where to write the index (default {spelling.PACKAGED_INDEX})",
+    )
+    options = parser.parse_args()
+    spelling.write_index(options.output)
+    index = SpellingIndex.open(options.output)
+    print(
+        f"wrote {options.output}: {index.count} words, "
+        f"{index.bucket_count} buckets, "
+        f"{os.path.getsize(options.output)} bytes",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
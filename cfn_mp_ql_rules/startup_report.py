@@ -0,0 +1,92 @@
+"""
+Where wrapped-cfn-lint's start up time goes, used by
+wrapped-cfn-lint --startup-report
+
+A fresh interpreter imports the wrapper and loads the rules collection under
+python -X importtime; the report totals each phase and lists the packages
+and modules that took longest to import.
+"""
+import os
+import re
+import subprocess
+import sys
+
+IMPORTTIME_LINE = re.compile(
+    r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$"
+)
+PROBE = """
+import time
+start = time.perf_counter()
+from cfn_mp_ql_rules import cfnlint_exit_code_wrapper as wrapper
+imported = time.perf_counter()
+import cfnlint.config
+args = cfnlint.config.ConfigMixIn([f"-a={wrapper.RULE_LOCATION}"])
+wrapper.get_rules(args)
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def parse_importtime(output):
+    """[(module, self microseconds, cumulative microseconds, depth)] from -X importtime output"""
+    modules = []
+    for line in output.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            modules.append(
+                (name, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+    return modules
+
+
+def startup_report(limit=10):
+    """Run the probe in a fresh interpreter and summarize its import times"""
+    package_parent = os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [package_parent] + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_time, rules_time = [
+        float(t) for t in proc.stdout.strip().splitlines()[-1].split()
+    ]
+    modules = parse_importtime(proc.stderr)
+    packages = {}
+    for name, self_us, _, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return {
+        "import_wrapper": import_time,
+        "load_rules": rules_time,
+        "modules_imported": len(modules),
+        "packages": sorted(packages.items(), key=lambda p: -p[1])[:limit],
+        "modules": sorted(
+            [(name, self_us) for name, self_us, _, _ in modules],
+            key=lambda m: -m[1],
+        )[:limit],
+    }
+
+
+def print_startup_report(file=None):
+    report = startup_report()
+    file = file or sys.stdout
+    print(f"import wrapper: {report['import_wrapper'] * 1000:8.1f} ms", file=file)
+    print(f"load rules:     {report['load_rules'] * 1000:8.1f} ms", file=file)
+    print(f"modules imported: {report['modules_imported']}", file=file)
+    for title, rows in [
+        ("import time by package", report["packages"]),
+        ("slowest modules", report["modules"]),
+    ]:
+        print(f"\n{title}:", file=file)
+        width = max(len(name) for name, _ in rows)
+        for name, self_us in rows:
+            print(f"  {name:<{width}}  {self_us / 1000:8.1f} ms", file=file)
@@ -1,4 +1,6 @@
+import unittest
 import cfnlint.core
+import cfnlint.template
 from cfn_mp_ql_rules import IAMPartition
 
 fn = "test/fixtures/templates/E9007/E9007.1.template.yaml"
@@ -24,3 +26,63 @@ def return_rule_line_matches(filename):
 
 # x = IAMPartition.IAMPartition()
 # x.match(cfn)
+
+
+class TestIAMPartition(unittest.TestCase):
+    def setUp(self):
+        template, _ = cfnlint.decode.decode(fn)
+        self.cfn = cfnlint.template.Template(fn, template)
+
+    def test_changes_are_partition_agnostic(self):
+        changes = IAMPartition.IAMPartition().determine_changes(self.cfn)
+        self.assertTrue(changes)
+        for path, old, new in changes:
+            self.assertIsInstance(old, str)
+            self.assertTrue(IAMPartition.ARN_PARTITION.match(old))
+            if IAMPartition.in_sub_string(path):
+                self.assertTrue(new.startswith("arn:${AWS::Partition}:"))
+            else:
+                self.assertTrue(
+                    new["Fn::Sub"].startswith("arn:${AWS::Partition}:")
+                )
+        self.assertIn(
+            "arn:${AWS::Partition}:s3:::${LambdaZipsBucketName}",
+            [new for _, _, new in changes],
+        )
+
+    def test_descends_into_intrinsics(self):
+        resource = {
+            "Fn::If": [
+                "InChina",
+                {"Fn::Join": ["", ["arn:aws-cn:s3:::", {"Ref": "Bucket"}]]},
+                {"Fn::Sub": ["arn:aws:s3:::${B}", {"B": "arn:aws:x"}]},
+            ]
+        }
+        self.assertEqual(
+            [
+                ["Resource", "Fn::If", 1, "Fn::Join", 1, 0],
+                ["Resource", "Fn::If", 2, "Fn::Sub", 0],
+                ["Resource", "Fn::If", 2, "Fn::Sub", 1, "B"],
+            ],
+            list(IAMPartition.hard_coded_partitions(["Resource"], resource)),
+        )
+
+    def test_arn_properties(self):
+        template = {
+            "Resources": {
+                "Role": {
+                    "Type": "AWS::IAM::Role",
+                    "Properties": {
+                        "PermissionsBoundary": "arn:aws:iam::aws:policy/X"
+                    },
+                }
+            }
+        }
+        cfn = cfnlint.template.Template("test.json", template)
+        rule = IAMPartition.IAMPartition()
+        self.assertEqual([], rule.match(cfn))
+        rule.configure({"arn_properties": ["PermissionsBoundary"]})
+        self.assertEqual(
+            [["Resources", "Role", "Properties", "PermissionsBoundary"]],
+            [match.path for match in rule.match(cfn)],
+        )
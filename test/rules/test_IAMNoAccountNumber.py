@@ -0,0 +1,69 @@
+import unittest
+import cfnlint.template
+from cfn_mp_ql_rules.IAMNoAccountNumber import IAMResourceWildcard
+
+STATEMENT = ["Resources", "Role", "Properties", "AssumeRolePolicyDocument"]
+TEMPLATE = {
+    "Resources": {
+        "Role": {
+            "Type": "AWS::IAM::Role",
+            "Properties": {
+                "AssumeRolePolicyDocument": {
+                    "Effect": "Allow",
+                    "Principal": {
+                        "AWS": [
+                            {
+                                "Fn::Sub": "arn:${AWS::Partition}:iam::${AWS::AccountId}:root"
+                            },
+                            "arn:aws:iam::123456789012:root",
+                            210987654321,
+                        ],
+                        "Service": "ec2.amazonaws.com",
+                    },
+                    "Resource": [
+                        "arn:aws:s3:::bucket-123456789012/*",
+                        {
+                            "Fn::Sub": "arn:${AWS::Partition}:sns:us-east-1:123456789012:topic"
+                        },
+                        {
+                            "Fn::Join": [
+                                "",
+                                [
+                                    "arn:aws:sqs:us-east-1:",
+                                    "123456789012",
+                                    ":queue",
+                                ],
+                            ]
+                        },
+                    ],
+                }
+            },
+        }
+    },
+    "Outputs": {"Account": {"Value": "123456789012"}},
+}
+
+
+class TestIAMNoAccountNumber(unittest.TestCase):
+    def setUp(self):
+        self.cfn = cfnlint.template.Template("test.json", TEMPLATE)
+
+    def test_reports_leaf_paths(self):
+        rule = IAMResourceWildcard()
+        self.assertEqual(
+            [
+                STATEMENT + ["Principal", "AWS", 1],
+                STATEMENT + ["Principal", "AWS", 2],
+                STATEMENT + ["Resource", 1, "Fn::Sub"],
+                STATEMENT + ["Resource", 2, "Fn::Join", 1, 1],
+            ],
+            [match.path for match in rule.match(self.cfn)],
+        )
+
+    def test_scan_template(self):
+        rule = IAMResourceWildcard()
+        rule.configure({"scan_template": True})
+        paths = [match.path for match in rule.match(self.cfn)]
+        self.assertIn(STATEMENT + ["Resource", 0], paths)
+        self.assertIn(["Outputs", "Account", "Value"], paths)
+        self.assertEqual(6, len(paths))
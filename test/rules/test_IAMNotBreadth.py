@@ -0,0 +1,145 @@
+import unittest
+import cfnlint.core
+import cfnlint.decode
+import cfnlint.template
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import RULE_LOCATION
+from cfn_mp_ql_rules.IAMNotBreadth import IAMNotBreadth
+
+FIXTURE = "test/fixtures/templates/WIAMPolicyNotElementBreadth/not_element_breadth.template.yaml"
+STATEMENTS = [
+    "Resources",
+    "Policy",
+    "Properties",
+    "PolicyDocument",
+    "Statement",
+]
+TEMPLATE = {
+    "Resources": {
+        "Policy": {
+            "Type": "AWS::IAM::Policy",
+            "Properties": {
+                "PolicyDocument": {
+                    "Statement": [
+                        {
+                            "Effect": "Allow",
+                            "NotAction": "s3:*",
+                            "Resource": "*",
+                        },
+                        {
+                            "Effect": "Allow",
+                            "NotAction": ["s3:*", "iam:*", "sts:*"],
+                            "Resource": "*",
+                        },
+                        {
+                            "Effect": "Deny",
+                            "NotAction": "iam:*",
+                            "Resource": "*",
+                        },
+                        {
+                            "Effect": "Allow",
+                            "Action": "sqs:SendMessage",
+                            "NotResource": "arn:aws:sqs:*:*:private",
+                        },
+                        {
+                            "Effect": "Allow",
+                            "Action": ["s3:GetObject", "s3:ListBucket"],
+                            "NotResource": "arn:aws:s3:::private/*",
+                        },
+                    ]
+                }
+            },
+        }
+    }
+}
+
+
+def _run_checks(include_experimental):
+    template, errors = cfnlint.decode.decode(FIXTURE)
+    assert not errors, errors
+    rules = cfnlint.core.get_rules(
+        [RULE_LOCATION], [], [], include_experimental=include_experimental
+    )
+    return cfnlint.core.run_checks(FIXTURE, template, rules, ["us-east-1"])
+
+
+class TestNotActionNotResourceBreadth(unittest.TestCase):
+    def setUp(self):
+        self.cfn = cfnlint.template.Template("test.json", TEMPLATE)
+
+    def test_not_action_ranked_by_breadth(self):
+        matches = [
+            match
+            for match in IAMNotBreadth().match(self.cfn)
+            if match.path[-1] == "NotAction"
+        ]
+        self.assertEqual(
+            [STATEMENTS + [0, "NotAction"], STATEMENTS + [1, "NotAction"]],
+            [match.path for match in matches],
+        )
+        self.assertTrue(
+            matches[0].message.startswith("NotAction statement 1 of 2 ")
+        )
+        everything = iam_data.action_bits("*")
+        self.assertEqual(
+            iam_data.action_count(
+                everything
+                & ~iam_data.action_bits("s3:*")
+                & ~iam_data.action_bits("iam:*")
+                & ~iam_data.action_bits("sts:*")
+            ),
+            matches[1].allowed_actions,
+        )
+        self.assertEqual(
+            len(iam_data.service_action_counts(everything)) - 3,
+            matches[1].allowed_services,
+        )
+        self.assertIn("broadest: ", matches[0].message)
+
+    def test_not_resource_open_resource_types(self):
+        matches = [
+            match
+            for match in IAMNotBreadth().match(self.cfn)
+            if match.path[-1] == "NotResource"
+        ]
+        self.assertEqual(
+            [STATEMENTS + [4, "NotResource"], STATEMENTS + [3, "NotResource"]],
+            [match.path for match in matches],
+        )
+        self.assertEqual(2, matches[0].allowed_actions)
+        self.assertEqual(
+            sorted(
+                set(iam_data.resource_types("s3:GetObject"))
+                | set(iam_data.resource_types("s3:ListBucket"))
+            ),
+            sorted(
+                iam_data.open_resource_types(
+                    iam_data.action_bits("s3:GetObject")
+                    | iam_data.action_bits("s3:ListBucket")
+                )
+            ),
+        )
+
+    def test_opt_in(self):
+        # no findings, so no change to the exit code, unless asked for
+        self.assertEqual([], _run_checks(include_experimental=False))
+
+    def test_rank_survives_the_runner(self):
+        # cfn-lint reports in line order, whatever order match() returns
+        matches = _run_checks(include_experimental=True)
+        self.assertEqual(
+            ["WIAMPolicyNotElementBreadth"] * 4,
+            [match.rule.id for match in matches],
+        )
+        self.assertEqual(
+            [11, 17, 24, 29], [match.linenumber for match in matches]
+        )
+        self.assertEqual(
+            [
+                "NotAction statement 2 of 2",
+                "NotAction statement 1 of 2",
+                "NotResource statement 2 of 2",
+                "NotResource statement 1 of 2",
+            ],
+            [match.message.split(" by breadth")[0] for match in matches],
+        )
@@ -0,0 +1,160 @@
+import unittest
+import cfnlint.decode
+import cfnlint.template
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.IAMResourceWildcard import IAMResourceWildcard
+
+KUBERNETES = "test/fixtures/templates/stackhelper/quickstart-heptio/templates/kubernetes-cluster.template"
+SSM = "test/fixtures/templates/stackhelper/quickstart-taskcat-ci/templates/ssm.template"
+ECR_OBJECT = ["ecr:GetDownloadUrlForLayer", "ecr:GetRepositoryPolicy"]
+ECR_RESOURCE = [
+    "ecr:BatchCheckLayerAvailability",
+    "ecr:BatchGetImage",
+    "ecr:DescribeRepositories",
+    "ecr:ListImages",
+]
+
+
+def _template(filename):
+    template, errors = cfnlint.decode.decode(filename)
+    assert not errors, errors
+    return cfnlint.template.Template(filename, template)
+
+
+def _policy(resource_type, actions):
+    return {
+        "Effect": "Allow",
+        "Action": actions,
+        "Resource": {"Fn::Ref": resource_type},
+    }
+
+
+def _statement(role):
+    return [
+        "Resources",
+        role,
+        "Properties",
+        "Policies",
+        0,
+        "PolicyDocument",
+        "Statement",
+        0,
+    ]
+
+
+def _summarize(subs):
+    """(statement path, new policies, deleted action paths) per statement"""
+    summary = []
+    for sub in subs:
+        if isinstance(sub, tuple):
+            path, _, policies, options = sub
+            assert options == {"append_after": True}
+            summary.append((path, policies, []))
+        else:
+            assert sub.delete_lines
+            summary[-1][2].append(sub.path)
+    return summary
+
+
+class TestIAMResourceWildcardChanges(unittest.TestCase):
+    def test_matches_baseline(self):
+        # as the pre-index remediation gave, with actions in sorted order
+        # rather than set order
+        node_role = _statement("NodeRole")
+        master_role = _statement("MasterRole")
+        self.assertEqual(
+            [
+                (
+                    node_role,
+                    [
+                        _policy("ecr/ecr-object", ECR_OBJECT),
+                        _policy("ecr/ecr-resource", ECR_RESOURCE),
+                    ],
+                    [node_role + ["Action", i] for i in [3, 4, 2, 7, 5, 6]],
+                ),
+                (
+                    master_role,
+                    [
+                        _policy(
+                            "autoscaling/autoscaling-resource",
+                            ["autoscaling:UpdateAutoScalingGroup"],
+                        ),
+                        _policy("ecr/ecr-object", ECR_OBJECT),
+                        _policy("ecr/ecr-resource", ECR_RESOURCE),
+                    ],
+                    [
+                        master_role + ["Action", i]
+                        for i in [10, 4, 5, 3, 8, 6, 7]
+                    ],
+                ),
+            ],
+            _summarize(
+                IAMResourceWildcard().determine_changes(_template(KUBERNETES))
+            ),
+        )
+
+    def test_ties_go_to_the_first_resource_type_by_name(self):
+        # ssm:PutParameter, DeleteParameter and DeleteParameters support
+        # ssm-object and ssm-resource alike; the pre-index remediation picked
+        # one in hash order
+        statement = [
+            "Resources",
+            "CreateSecureStringParameterKeyRole",
+            "Properties",
+            "Policies",
+            0,
+            "PolicyDocument",
+            "Statement",
+            1,
+        ]
+        changes = {
+            tuple(path): (policies, deleted)
+            for path, policies, deleted in _summarize(
+                IAMResourceWildcard().determine_changes(_template(SSM))
+            )
+        }
+        self.assertEqual(
+            (
+                [
+                    _policy(
+                        "ssm/ssm-object",
+                        [
+                            "ssm:DeleteParameter",
+                            "ssm:DeleteParameters",
+                            "ssm:PutParameter",
+                        ],
+                    )
+                ],
+                [statement + ["Action", i] for i in [1, 2, 0]],
+            ),
+            changes[tuple(statement)],
+        )
+
+    def test_large_policy_moves_each_action_once(self):
+        action_types = iam_data.resource_type_index()[0]
+        actions = sorted(a for a in action_types if a.startswith("ec2:"))
+        actions = actions[:300]
+        statement = {"Effect": "Allow", "Action": actions, "Resource": "*"}
+        template = {
+            "Resources": {
+                "Policy": {
+                    "Type": "AWS::IAM::ManagedPolicy",
+                    "Properties": {
+                        "PolicyDocument": {"Statement": [statement]}
+                    },
+                }
+            }
+        }
+        cfn = cfnlint.template.Template("test.json", template)
+        [(_, policies, deleted)] = _summarize(
+            IAMResourceWildcard().determine_changes(cfn)
+        )
+        moved = [a for policy in policies for a in policy["Action"]]
+        self.assertEqual(sorted(actions), sorted(moved))
+        self.assertEqual(
+            moved, [actions[path[-1]] for path in deleted]
+        )
+        for policy in policies:
+            resource_type = policy["Resource"]["Fn::Ref"]
+            for action in policy["Action"]:
+                self.assertIn(resource_type, action_types[action])
@@ -0,0 +1,277 @@
+import ast
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+import cfnlint.core
+import cfnlint.decode
+import cfnlint.template
+from cfn_mp_ql_rules import spelling
+from cfn_mp_ql_rules.cfnlint_exit_code_wrapper import RULE_LOCATION
+from cfn_mp_ql_rules.SentenceCase import Base as SentenceCase, strip_urls
+
+INTERFACE = ["Metadata", "AWS::CloudFormation::Interface"]
+FIXTURES = [
+    "test/fixtures/templates/stackhelper/quickstart-compliance-dod-scca/templates/main.yaml",
+    "test/fixtures/templates/stackhelper/quickstart-ec2-ipsec-mesh/templates/ipsec-setup.yaml",
+    "test/fixtures/templates/stackhelper/quickstart-hashicorp-consul/templates/quickstart-hashicorp-consul.template",
+    "test/fixtures/templates/stackhelper/quickstart-microsoft-powershelldsc/templates/dsc-pull.template",
+    "test/fixtures/templates/W9006/quickstart_documentation.template.yaml",
+]
+# the only fixture with QuickStartDocumentation, so the only one W9006 checks
+ENTRY_POINT = FIXTURES[-1]
+# overlapping and prefix proper nouns, on top of the custom dictionary's own
+# "Availability Zone"/"Availability Zones"
+PROPER_NOUNS = ["AWS", "AWS CloudFormation", "CloudFormation", "Amazon EC2"]
+TEMPLATE = {
+    "Metadata": {
+        "QuickStartDocumentation": True,
+        "AWS::CloudFormation::Interface": {
+            "ParameterGroups": [
+                {"Label": {"default": "Database Settings"}},
+                {"Label": {"default": "Bucket configuraton"}},
+            ],
+            "ParameterLabels": {
+                "Bucket": {"default": "Bucket naem"},
+                "Subnet": {"default": "Subnet CIDR"},
+                "Other": {},
+            },
+        },
+    },
+    "Parameters": {
+        "Bucket": {"Description": "Name of the Amazon S3 bucket"},
+        "Subnet": {"Description": "the subnet for the Bastion host."},
+        "Copy": {"Description": "Name of the Amazon S3 bucket"},
+    },
+}
+
+
+class CountingSpellChecker:
+    def __init__(self):
+        self.spell = spelling.spell_checker()
+        self.unknown_calls = 0
+
+    def unknown(self, words):
+        self.unknown_calls += 1
+        return self.spell.unknown(words)
+
+
+def _per_word_get_errors(description, custom_dict, sentence_case_exclude):
+    """
+    get_words as it was before proper_noun_matcher, stripping one proper noun
+    at a time. Longest first: in other orders, overlapping nouns strip
+    differently, and that order came from set iteration.
+    """
+    dict_words = set([])
+    title_errors = set([])
+    description = re.sub(r"^[\[\(]OPTIONAL[\]\)] ", "", description, flags=re.IGNORECASE)
+    description = re.sub(r"\b[a-z]+-(?:[0-9a-f]{8}|[0-9a-f]{17})\b", "", description)
+    description = re.sub(r"\barn:\S+\b", "", description)
+    longest_first = lambda words: sorted(words, key=lambda w: (-len(w), w))
+    for pn in longest_first(set(custom_dict).union(sentence_case_exclude)):
+        description = re.sub(r"\b" + re.escape(pn) + r"\b", "", description)
+    for sentence in description.split("."):
+        word_no = 0
+        for pn in longest_first(custom_dict):
+            if sentence.startswith(pn):
+                word_no += 1
+            sentence = re.sub(r"\b" + re.escape(pn) + r"\b", "", sentence, flags=re.IGNORECASE)
+        if len(sentence.strip()) > 1:
+            if sentence[0].upper() != sentence[0]:
+                title_errors.add(sentence.split()[0])
+            else:
+                for word in re.split("[^a-zA-Z]", sentence):
+                    if word:
+                        if word_no == 0 and word != word.upper():
+                            dict_words.add(word)
+                        elif word != word.upper():
+                            dict_words.add(word)
+                            if word[0].isupper():
+                                title_errors.add(word)
+                        word_no += 1
+    return dict_words, title_errors
+
+
+def _fixture_descriptions():
+    """(text, LintSpellExclude, SentenceCaseExclude) for every text W9006 checks"""
+    descriptions = []
+    for filename in FIXTURES:
+        template, errors = cfnlint.decode.decode(filename)
+        assert not errors, errors
+        metadata = template.get("Metadata", {})
+        lint_exclude = metadata.get("LintSpellExclude", [])
+        exclude = metadata.get("SentenceCaseExclude", [])
+        texts = [
+            parameter["Description"]
+            for parameter in template["Parameters"].values()
+            if "Description" in parameter
+        ]
+        interface = metadata.get("AWS::CloudFormation::Interface", {})
+        texts += [
+            group["Label"]["default"]
+            for group in interface.get("ParameterGroups", [])
+        ]
+        texts += [
+            label["default"]
+            for label in interface.get("ParameterLabels", {}).values()
+        ]
+        descriptions += [(text, lint_exclude, exclude) for text in texts]
+    return descriptions
+
+
+class TestProperNouns(unittest.TestCase):
+    def test_matches_per_word_stripping(self):
+        descriptions = _fixture_descriptions()
+        self.assertTrue(
+            any("Availability Zones" in d for d, _, _ in descriptions)
+        )
+        self.assertTrue(any(lint for _, lint, _ in descriptions))
+        for description, lint_exclude, exclude in descriptions:
+            custom_dict = spelling.proper_nouns(PROPER_NOUNS + lint_exclude)
+            with self.subTest(description=description):
+                self.assertEqual(
+                    _per_word_get_errors(description, custom_dict, exclude),
+                    SentenceCase.get_words(description, custom_dict, exclude),
+                )
+
+    def test_overlapping_proper_nouns(self):
+        self.custom_dict = spelling.proper_nouns(PROPER_NOUNS)
+        for description, expected in [
+            # stripped whole, not as "AWS" leaving "CloudFormation" behind
+            ("AWS CloudFormation stack name.", ({"stack"}, set())),
+            ("The AWS CloudFormation Stack name.", ({"The", "Stack"}, {"Stack"})),
+            # sentences are stripped case insensitively
+            ("aws cloudformation Stack name.", ({"Stack"}, set())),
+            # only whole words are proper nouns
+            ("AWS CloudFormationStack name.", ({"CloudFormationStack"}, set())),
+            ("Availability Zones to use.", ({"to", "use"}, set())),
+            (
+                "Choose the Amazon EC2 Instance type.",
+                ({"Choose", "the", "Instance", "type"}, {"Instance"}),
+            ),
+        ]:
+            with self.subTest(description=description):
+                self.assertEqual(
+                    expected,
+                    SentenceCase.get_words(description, self.custom_dict, []),
+                )
+                self.assertEqual(
+                    expected,
+                    _per_word_get_errors(description, self.custom_dict, []),
+                )
+
+
+class TestSentenceCase(unittest.TestCase):
+    def setUp(self):
+        self.cfn = cfnlint.template.Template("test.json", TEMPLATE)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.spell = CountingSpellChecker()
+        verdicts = spelling.VerdictCache(
+            os.path.join(self.tmpdir.name, "spelling.json"),
+            "test",
+            lambda: self.spell,
+        )
+        patcher = mock.patch.object(spelling, "verdicts", lambda: verdicts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_one_lookup_per_template(self):
+        matches = SentenceCase().match(self.cfn)
+        self.assertEqual(1, self.spell.unknown_calls)
+        self.assertEqual(
+            [
+                ["Parameters", "Bucket", "Description"],
+                ["Parameters", "Subnet", "Description"],
+                ["Parameters", "Copy", "Description"],
+                INTERFACE + ["ParameterGroups", 0, "Label", "default"],
+                INTERFACE + ["ParameterGroups", 1, "Label", "default"],
+                INTERFACE + ["ParameterLabels", "Bucket", "default"],
+                INTERFACE + ["ParameterLabels", "Other"],
+            ],
+            [match.path for match in matches],
+        )
+
+    def test_matches_per_description_checks(self):
+        rule = SentenceCase()
+        messages = {
+            tuple(match.path): match.message for match in rule.match(self.cfn)
+        }
+        groups = INTERFACE + ["ParameterGroups"]
+        labels = INTERFACE + ["ParameterLabels"]
+        for path, description in [
+            (groups + [0, "Label", "default"], "Database Settings"),
+            (groups + [1, "Label", "default"], "Bucket configuraton"),
+            (labels + ["Bucket", "default"], "Bucket naem"),
+        ]:
+            spell_errors, title_errors = rule.get_errors(
+                description,
+                spelling.spell_checker(),
+                spelling.proper_nouns(),
+                [],
+            )
+            self.assertTrue(
+                messages[tuple(path)].endswith(
+                    str(spell_errors or title_errors)
+                )
+            )
+        self.assertEqual(
+            'Parameter Group name "Database Settings" is not sentence case: '
+            "{'Settings'}",
+            messages[tuple(groups + [0, "Label", "default"])],
+        )
+        self.assertEqual(
+            "Parameter Label contains spelling error(s): {'naem'}",
+            messages[tuple(labels + ["Bucket", "default"])],
+        )
+
+
+class TestEntryPointFixture(unittest.TestCase):
+    def test_matches_per_text_checks(self):
+        # through the cfn-lint runner, each batched finding is what checking
+        # its text on its own gives
+        template, errors = cfnlint.decode.decode(ENTRY_POINT)
+        self.assertEqual([], errors)
+        rules = cfnlint.core.get_rules([RULE_LOCATION], [], [])
+        matches = [
+            match
+            for match in cfnlint.core.run_checks(
+                ENTRY_POINT, template, rules, ["us-east-1"]
+            )
+            if match.rule.id == SentenceCase.id
+        ]
+        self.assertEqual(
+            [21, 26, 44, 62, 66, 70, 70],
+            [match.linenumber for match in matches],
+        )
+        metadata = template["Metadata"]
+        custom_dict = spelling.proper_nouns(metadata["LintSpellExclude"])
+        reported = set()
+        for match in matches:
+            if match.message.endswith('must end in a full stop "."'):
+                continue
+            text = template
+            for key in match.path:
+                text = text[key]
+            spell_errors, title_errors = SentenceCase.get_errors(
+                strip_urls(text),
+                spelling.spell_checker(),
+                custom_dict,
+                metadata["SentenceCaseExclude"],
+            )
+            found = ast.literal_eval(match.message.split(": ", 1)[1])
+            reported |= found
+            with self.subTest(path=match.path):
+                self.assertEqual(
+                    spell_errors if "spelling" in match.message else title_errors,
+                    found,
+                )
+        # excluded proper nouns aren't reported, misspellings are
+        self.assertFalse(
+            reported
+            & {"Zorblax", "zorblax", "Grafana", "HashiCorp", "Kubernetes"}
+        )
+        self.assertLessEqual(
+            {"monitering", "pasword", "charaters", "dashbord"}, reported
+        )
@@ -0,0 +1,45 @@
+import unittest
+import cfnlint.decode
+import cfnlint.template
+from cfn_mp_ql_rules.common import get_template_index
+
+
+class TestTemplateKeyIndex(unittest.TestCase):
+    template_path = "test/fixtures/templates/E9007/E9007.1.template.yaml"
+
+    def setUp(self):
+        template, _ = cfnlint.decode.decode(self.template_path)
+        self.cfn = cfnlint.template.Template(self.template_path, template)
+
+    def test_matches_search_deep_keys(self):
+        index = get_template_index(self.cfn)
+        for key in ["Action", "Resource", "Principal", "ManagedPolicyArns"]:
+            self.assertEqual(
+                self.cfn.search_deep_keys(key), index.search_deep_keys(key)
+            )
+
+    def test_memoized_on_template(self):
+        self.assertIs(
+            get_template_index(self.cfn), get_template_index(self.cfn)
+        )
+
+    def test_results_are_copies(self):
+        index = get_template_index(self.cfn)
+        index.search_deep_keys("Resource")[0].append("mutated")
+        self.assertNotEqual(
+            "mutated", index.search_deep_keys("Resource")[0][-1]
+        )
+
+    def test_missing_key(self):
+        self.assertEqual(
+            [], get_template_index(self.cfn).search_deep_keys("NoSuchKey")
+        )
+
+    def test_search_containers(self):
+        index = get_template_index(self.cfn)
+        for (path, container), result in zip(
+            index.search_containers("Resource"),
+            index.search_deep_keys("Resource"),
+        ):
+            self.assertEqual(result[:-2], path)
+            self.assertIs(result[-1], container["Resource"])
@@ -0,0 +1,62 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from cfn_mp_ql_rules import cfnlint_exit_code_wrapper, iam_data, spelling
+from cfn_mp_ql_rules.result_cache import ResultCache
+
+RULE_LOCATION = os.path.dirname(
+    os.path.abspath(cfnlint_exit_code_wrapper.__file__)
+)
+TEMPLATES = [
+    "test/fixtures/templates/E9007/E9007.1.template.yaml",
+    "test/fixtures/templates/bad/resources/smit_test/EIAMNoInlinePolicy.yml",
+    "test/fixtures/templates/bad/resources/cfnnag/EKMSKeyEnableKeyRotation.json",
+]
+
+
+class TestWrapper(unittest.TestCase):
+    def _run(self, cache=None, jobs=1):
+        argv = [f"-a={RULE_LOCATION}", "--format", "json"] + TEMPLATES
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            ec = cfnlint_exit_code_wrapper.run(argv, RULE_LOCATION, cache, jobs)
+        return ec, out.getvalue()
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(self._run(), self._run(jobs=2))
+
+    def test_cache_replay_matches_lint(self):
+        expected = self._run()
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            self.assertEqual(expected, self._run(cache=cache))
+            self.assertEqual(expected, self._run(cache=cache))
+            self.assertEqual(len(TEMPLATES), cache.hits)
+
+    def test_cache_keyed_on_rule_data(self):
+        # upgrading policyuniverse or pyspellchecker changes the findings
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            self._run(cache=cache)
+            for module, name in [
+                (iam_data, "source_digest"),
+                (spelling, "dictionary_version"),
+            ]:
+                with mock.patch.object(module, name, return_value="upgraded"):
+                    self._run(cache=cache)
+            self.assertEqual(0, cache.hits)
+
+    def test_get_rules_without_cfn_lint_cache(self):
+        # all a cache hit, on a cfn-lint without its private rule cache
+        import cfnlint.config
+        import cfnlint.core
+
+        args = cfnlint.config.ConfigMixIn([f"-a={RULE_LOCATION}"])
+        with mock.patch.object(
+            cfnlint.core, "get_used_rules", return_value=None
+        ), mock.patch.object(cfnlint.core, "_build_rule_cache", None):
+            rules = cfnlint_exit_code_wrapper.get_rules(args)
+        self.assertTrue(cfnlint_exit_code_wrapper.find_rule("E9007", rules))
@@ -0,0 +1,108 @@
+import unittest
+import cfnlint.template
+from cfn_mp_ql_rules import iam_data
+from cfn_mp_ql_rules.effective_permissions import get_effective_permissions
+from cfn_mp_ql_rules.IAMPermissionBudget import IAMPermissionBudget
+
+
+def policy(*statements):
+    return {"PolicyDocument": {"Statement": list(statements)}}
+
+
+TEMPLATE = {
+    "Resources": {
+        "Role": {
+            "Type": "AWS::IAM::Role",
+            "Properties": {
+                "AssumeRolePolicyDocument": {
+                    "Statement": [
+                        {"Effect": "Allow", "Action": "sts:AssumeRole"}
+                    ]
+                },
+                "Policies": [
+                    policy({"Effect": "Allow", "Action": ["s3:Get*"]})
+                ],
+                "ManagedPolicyArns": [{"Ref": "Managed"}],
+            },
+        },
+        "Managed": {
+            "Type": "AWS::IAM::ManagedPolicy",
+            "Properties": policy(
+                {"Effect": "Allow", "Action": "sqs:*", "Resource": "*"},
+                {
+                    "Effect": "Deny",
+                    "Action": "sqs:Delete*",
+                    "Resource": "*",
+                },
+            ),
+        },
+        "Group": {
+            "Type": "AWS::IAM::Group",
+            "Properties": {
+                "Policies": [
+                    policy({"Effect": "Allow", "NotAction": "iam:*"})
+                ]
+            },
+        },
+        "User": {
+            "Type": "AWS::IAM::User",
+            "Properties": {"Groups": [{"Ref": "Group"}]},
+        },
+        "UserPolicy": {
+            "Type": "AWS::IAM::Policy",
+            "Properties": dict(
+                policy(
+                    {
+                        "Effect": "Deny",
+                        "Action": "ec2:*",
+                        "Resource": "*",
+                    }
+                ),
+                Users=[{"Ref": "User"}],
+            ),
+        },
+    }
+}
+
+
+def bits(*patterns):
+    result = 0
+    for pattern in patterns:
+        result |= iam_data.action_bits(pattern)
+    return result
+
+
+class TestEffectivePermissions(unittest.TestCase):
+    def setUp(self):
+        self.cfn = cfnlint.template.Template("test.json", TEMPLATE)
+
+    def test_inline_and_attached_policies(self):
+        permissions = get_effective_permissions(self.cfn)
+        self.assertEqual(
+            bits("s3:Get*", "sqs:*") & ~bits("sqs:Delete*"),
+            permissions.allowed("Role"),
+        )
+        self.assertNotIn(
+            "sts:AssumeRole",
+            iam_data.action_names(permissions.allowed("Role")),
+        )
+
+    def test_not_action_and_groups(self):
+        permissions = get_effective_permissions(self.cfn)
+        everything_but_iam = bits("*") & ~bits("iam:*")
+        self.assertEqual(everything_but_iam, permissions.allowed("Group"))
+        self.assertEqual(
+            everything_but_iam & ~bits("ec2:*"), permissions.allowed("User")
+        )
+
+    def test_budget(self):
+        rule = IAMPermissionBudget()
+        # opt-in, and a warning, so it doesn't change existing exit codes
+        self.assertTrue(rule.experimental)
+        self.assertEqual("W", rule.id[0])
+        self.assertEqual(
+            [["Resources", "Group"], ["Resources", "User"]],
+            [match.path for match in rule.match(self.cfn)],
+        )
+        rule.configure({"max_actions": 20000})
+        self.assertEqual([], rule.match(self.cfn))
@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from cfn_mp_ql_rules import iam_artifact, iam_data
+
+SERVICE_DATA = {
+    "Amazon S3": {
+        "prefix": "s3",
+        "actions": {"GetObject": {}, "ListAllMyBuckets": {}},
+    },
+}
+RESOURCE_ONLY = ["s3:ListAllMyBuckets"]
+RESOURCE_TYPES = {"s3:GetObject": ["object*"]}
+
+
+class TestIAMData(unittest.TestCase):
+    def test_rules_import_without_loading_data(self):
+        code = (
+            "import sys\n"
+            "import cfn_mp_ql_rules.IAMActionWildcard\n"
+            "import cfn_mp_ql_rules.IAMResourceWildcard\n"
+            "from cfn_mp_ql_rules import iam_data\n"
+            "assert 'policyuniverse' not in sys.modules\n"
+            "assert iam_data.artifact.cache_info().currsize == 0\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_source_digest_stats_policyuniverse_data(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "data.json")
+            with open(path, "w") as f:
+                f.write("{}")
+            with mock.patch.object(
+                iam_data, "_policyuniverse_data_path", lambda: path
+            ), mock.patch.object(
+                iam_data, "file_digest", wraps=iam_data.file_digest
+            ) as digest:
+                before = iam_data.source_digest()
+                os.utime(path, ns=(0, 0))
+                self.assertNotEqual(before, iam_data.source_digest())
+            # only the package's own, small, data files are read
+            self.assertNotIn(path, [c.args[0] for c in digest.call_args_list])
+
+    def test_lookups(self):
+        self.assertEqual(
+            "ec2:DescribeInstances",
+            iam_data.canonical_action("ec2:describeinstances"),
+        )
+        self.assertEqual("nope:Nope", iam_data.canonical_action("nope:Nope"))
+        # resource-only although policyuniverse doesn't list it
+        self.assertTrue(
+            iam_data.is_resource_only("deepracer:CreateAccountResources")
+        )
+        self.assertIn(
+            "ec2:describeinstances",
+            iam_data.get_actions_from_statement({"Action": ["ec2:Describe*"]}),
+        )
+
+    def test_expand_action(self):
+        for pattern in ["ec2:Describe*", "EC2:*Instances", "iam:?etRole*"]:
+            expected = {
+                iam_data.canonical_action(k)
+                for k in iam_data.get_actions_from_statement(
+                    {"Action": [pattern]}
+                )
+            }
+            self.assertEqual(expected, iam_data.expand_action(pattern))
+        self.assertIn("ec2:DescribeInstances", iam_data.expand_action("ec2:*"))
+        self.assertEqual({"nope:*"}, iam_data.expand_action("Nope:*"))
+
+    def test_expansions_are_memoized(self):
+        before = iam_data.cache_stats()["expand_action"]
+        first = iam_data.expand_action("logs:Create*")
+        self.assertIs(first, iam_data.expand_action("LOGS:create*"))
+        after = iam_data.cache_stats()["expand_action"]
+        self.assertEqual(before["hits"] + 1, after["hits"])
+
+    def test_action_bits(self):
+        for pattern in ["ec2:Describe*", "iam:?etRole*", "*", "nope:*"]:
+            self.assertEqual(
+                sorted(iam_data.expand_action(pattern) - {pattern.lower()}),
+                sorted(
+                    iam_data.action_names(iam_data.action_bits(pattern))
+                ),
+            )
+        bits = iam_data.action_bits("s3:Get*")
+        self.assertEqual(
+            len(iam_data.expand_action("s3:Get*")),
+            iam_data.action_count(bits),
+        )
+        self.assertEqual(bits, iam_data.action_bits("S3:GET*"))
+
+    def test_service_action_counts(self):
+        everything = iam_data.action_bits("*")
+        for bits in [
+            iam_data.action_bits("s3:Get*") | iam_data.action_bits("sqs:*"),
+            everything & ~iam_data.action_bits("iam:*"),
+        ]:
+            expected = {}
+            for name in iam_data.action_names(bits):
+                service = name.split(":")[0].lower()
+                expected[service] = expected.get(service, 0) + 1
+            self.assertEqual(expected, iam_data.service_action_counts(bits))
+        self.assertEqual(
+            {
+                service: total
+                for service, total in iam_data.service_totals().items()
+                if total
+            },
+            iam_data.service_action_counts(everything),
+        )
+
+    def test_resource_type_index(self):
+        action_types, type_actions = iam_data.resource_type_index()
+        self.assertIs(action_types, iam_data.resource_type_index()[0])
+        for action, resource_types in iam_data.granular_permissions():
+            self.assertEqual(set(resource_types), action_types[action])
+            for resource_type in resource_types:
+                self.assertIn(action, type_actions[resource_type])
+
+
+class TestIAMArtifact(unittest.TestCase):
+    def test_round_trip(self):
+        data = iam_artifact.build_artifact(
+            "00" * 32, SERVICE_DATA, RESOURCE_ONLY, RESOURCE_TYPES
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "iam_data.bin")
+            with open(path, "wb") as f:
+                f.write(data)
+            artifact = iam_artifact.IAMArtifact.open(path)
+            self.assertEqual("00" * 32, artifact.digest)
+            self.assertEqual(2, artifact.count)
+            idx = artifact.find("S3:GETOBJECT")
+            self.assertEqual("s3:GetObject", artifact.name(idx))
+            self.assertEqual(
+                iam_artifact.POLICYUNIVERSE | iam_artifact.GRANULAR,
+                artifact.flags(idx),
+            )
+            self.assertEqual(
+                ["s3/object*"],
+                [
+                    artifact.resource_type_name(i)
+                    for i in artifact.resource_type_ids(idx)
+                ],
+            )
+            idx = artifact.find("s3:ListAllMyBuckets")
+            self.assertTrue(artifact.flags(idx) & iam_artifact.RESOURCE_ONLY)
+            self.assertEqual([], artifact.resource_type_ids(idx))
+            self.assertEqual(range(0, 2), artifact.prefix_range("S3:"))
+            self.assertEqual(range(0, 1), artifact.prefix_range("s3:g"))
+            self.assertEqual(range(2, 2), artifact.prefix_range("s4"))
+            self.assertIsNone(artifact.find("s3:PutObject"))
+            self.assertIsNone(artifact.find("s3:GetObjecté"))
+
+    def test_rejects_other_formats(self):
+        with self.assertRaises(iam_artifact.ArtifactError):
+            iam_artifact.IAMArtifact(b"not an artifact" * 10)
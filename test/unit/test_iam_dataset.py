@@ -0,0 +1,92 @@
+import json
+import os
+import unittest
+from cfn_mp_ql_rules import iam_data, iam_dataset
+
+SERVICE_DATA = {
+    "Amazon S3": {
+        "prefix": "s3",
+        "actions": {"GetObject": {}, "ListAllMyBuckets": {}, "PutObject": {}},
+    },
+}
+
+
+class TestIAMDataset(unittest.TestCase):
+    def test_reads_legacy_formats(self):
+        self.assertEqual(
+            {"s3:ListAllMyBuckets"},
+            iam_dataset.read_resource_only(
+                {"s3:GetObject": False, "s3:ListAllMyBuckets": True}
+            ),
+        )
+        self.assertEqual(
+            {"s3:GetObject": ["object*"]},
+            iam_dataset.read_resource_types(
+                {
+                    "s3:GetObject": {
+                        "resource_types": {"object*": {}, "": {}}
+                    },
+                    "s3:ListAllMyBuckets": {"resource_types": {"": {}}},
+                }
+            ),
+        )
+
+    def test_regenerate(self):
+        resource_only, resource_types = iam_dataset.regenerate(
+            SERVICE_DATA,
+            {"S3:listallmybuckets", "s3:ListEverything"},
+            {"s3:getobject": ["object*"], "s3:GetObject": ["bucket"]},
+        )
+        # actions policyuniverse doesn't list are kept, as written
+        self.assertEqual(
+            ["s3:ListAllMyBuckets", "s3:ListEverything"], resource_only
+        )
+        self.assertEqual(
+            {"s3:GetObject": ["bucket", "object*"]}, resource_types
+        )
+        summary = iam_dataset.diff_summary(
+            SERVICE_DATA,
+            ({"s3:ListEverything", "s3:ListNothing"}, {}),
+            (resource_only, resource_types),
+        )
+        self.assertIn("resource-only actions: 2 (+1 -1)", summary)
+        self.assertIn("  - s3:ListNothing", summary)
+        self.assertIn("  + s3:GetObject", summary)
+        self.assertIn(
+            "policyuniverse actions without resource data: 1", summary
+        )
+        self.assertIn("kept actions policyuniverse doesn't list: 1", summary)
+        self.assertIn("  ? s3:ListEverything", summary)
+
+    def test_round_trip(self):
+        resource_only = ["s3:ListAllMyBuckets", "s3:GetBucketAcl"]
+        resource_types = {"s3:PutObject": ["object*"], "s3:GetObject": ["x"]}
+        text = iam_dataset.dumps_resource_only(resource_only)
+        self.assertEqual(
+            text, iam_dataset.dumps_resource_only(resource_only[::-1])
+        )
+        self.assertEqual(
+            set(resource_only),
+            iam_dataset.read_resource_only(json.loads(text)),
+        )
+        text = iam_dataset.dumps_resource_types(resource_types)
+        self.assertEqual(
+            resource_types,
+            iam_dataset.read_resource_types(json.loads(text)),
+        )
+
+    def test_packaged_files_are_pretty_formatted(self):
+        # as the pretty-format-json pre-commit hook writes them, so the hook
+        # and the generator agree
+        for name, dumps in [
+            (iam_dataset.RESOURCE_ONLY_FILE, iam_dataset.dumps_resource_only),
+            (
+                iam_dataset.RESOURCE_TYPES_FILE,
+                iam_dataset.dumps_resource_types,
+            ),
+        ]:
+            with open(os.path.join(iam_data.DATA_DIR, name)) as f:
+                text = f.read()
+            pretty = json.dumps(json.loads(text), indent=2) + "\n"
+            self.assertEqual(pretty, text)
+            self.assertEqual(text, dumps(json.loads(text)))
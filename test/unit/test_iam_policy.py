@@ -0,0 +1,77 @@
+import unittest
+import cfnlint.template
+from cfn_mp_ql_rules.iam_policy import get_policy_model
+
+TEMPLATE = {
+    "Resources": {
+        "Policy": {
+            "Type": "AWS::IAM::Policy",
+            "Properties": {
+                "PolicyDocument": {
+                    "Statement": [
+                        {
+                            "Effect": "Allow",
+                            "Action": ["s3:GetObject"],
+                            "Resource": "*",
+                            "Condition": {
+                                "Bool": {"aws:SecureTransport": True}
+                            },
+                        },
+                        {
+                            "Effect": "Deny",
+                            "NotAction": "iam:*",
+                            "NotResource": "*",
+                        },
+                    ]
+                }
+            },
+        },
+        "Permission": {
+            "Type": "AWS::Lambda::Permission",
+            "Properties": {"Principal": "s3.amazonaws.com"},
+        },
+    }
+}
+STATEMENTS = [
+    "Resources",
+    "Policy",
+    "Properties",
+    "PolicyDocument",
+    "Statement",
+]
+
+
+class TestPolicyModel(unittest.TestCase):
+    def setUp(self):
+        self.cfn = cfnlint.template.Template("test.json", TEMPLATE)
+
+    def test_statements(self):
+        model = get_policy_model(self.cfn)
+        self.assertEqual(3, len(model.statements()))
+        statement = model.statement_at(STATEMENTS + [0])
+        self.assertEqual("Allow", statement.effect)
+        self.assertEqual(["s3:GetObject"], statement.action)
+        self.assertEqual("*", statement.resource)
+        self.assertIsNone(statement.not_action)
+        self.assertTrue(statement.condition)
+        statement = model.statement_at(STATEMENTS + [1])
+        self.assertEqual("iam:*", statement.not_action)
+        self.assertEqual("*", statement.not_resource)
+        self.assertIsNone(statement.action)
+
+    def test_with_key(self):
+        model = get_policy_model(self.cfn)
+        self.assertEqual(
+            [STATEMENTS + [0]], [s.path for s in model.with_key("Resource")]
+        )
+        self.assertEqual(
+            [["Resources", "Permission", "Properties"]],
+            [s.path for s in model.with_key("Principal")],
+        )
+        self.assertIs(
+            model.statement_at(STATEMENTS + [1]),
+            model.with_key("NotAction")[0],
+        )
+
+    def test_memoized_on_template(self):
+        self.assertIs(get_policy_model(self.cfn), get_policy_model(self.cfn))
@@ -0,0 +1,95 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from cfn_mp_ql_rules.incremental import (
+    changed_files,
+    nested_stack_children,
+    select_templates,
+)
+
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"
+)
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        + list(args),
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmpdir.name, "repo")
+        shutil.copytree(TEMPLATES_DIR, os.path.join(self.repo, "templates"))
+        with open(os.path.join(self.repo, "templates", "other.yml"), "w") as f:
+            f.write("Resources: {}\n")
+        git(self.repo, "init", "-q")
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "base")
+        self.filenames = [
+            os.path.join("templates", name)
+            for name in ["child.yml", "master.yml", "other.yml"]
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.repo, "templates", name)
+
+    def _select(self):
+        cwd = os.getcwd()
+        os.chdir(self.repo)
+        try:
+            return select_templates(self.filenames, "HEAD")
+        finally:
+            os.chdir(cwd)
+
+    def test_nothing_changed(self):
+        self.assertEqual([], self._select())
+
+    def test_changed_child_selects_parent(self):
+        with open(self._path("child.yml"), "a") as f:
+            f.write("\n")
+        self.assertEqual(
+            ["templates/child.yml", "templates/master.yml"], self._select()
+        )
+
+    def test_changed_parent_selects_child(self):
+        with open(self._path("master.yml"), "a") as f:
+            f.write("\n")
+        self.assertEqual(
+            ["templates/child.yml", "templates/master.yml"], self._select()
+        )
+
+    def test_untracked_and_deleted(self):
+        with open(self._path("new.yml"), "w") as f:
+            f.write("Resources: {}\n")
+        os.remove(self._path("other.yml"))
+        changed, deleted = changed_files("HEAD", self.repo)
+        self.assertIn(os.path.realpath(self._path("new.yml")), changed)
+        self.assertEqual({os.path.realpath(self._path("other.yml"))}, deleted)
+
+    def test_malformed_stack_properties(self):
+        # as a stack with no Properties: its child can't be resolved
+        for properties in [None, "TemplateURL", ["TemplateURL"]]:
+            template = {
+                "Resources": {
+                    "Stack": {
+                        "Type": "AWS::CloudFormation::Stack",
+                        "Properties": properties,
+                    }
+                }
+            }
+            with self.subTest(properties=properties):
+                self.assertIsNone(
+                    nested_stack_children(self._path("master.yml"), template)
+                )
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from cfn_mp_ql_rules import cfnlint_exit_code_wrapper, lint_server
+
+TEMPLATES = [
+    "test/fixtures/templates/E9007/E9007.1.template.yaml",
+    "test/fixtures/templates/bad/resources/cfnnag/EKMSKeyEnableKeyRotation.json",
+]
+EXPERIMENTAL = "test/fixtures/templates/WIAMPolicyNotElementBreadth/not_element_breadth.template.yaml"
+EXTRA_RULE = """
+from cfnlint.rules import CloudFormationLintRule, RuleMatch
+
+
+class Everything(CloudFormationLintRule):
+    id = "E9999"
+    shortdesc = "Everything"
+    description = "Reports every template"
+
+    def match(self, cfn):
+        return [RuleMatch(["Resources"], "E9999 everything")]
+"""
+
+
+class TestLintServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "lint.sock")
+        self.server = lint_server.LintServer(self.socket_path, idle_timeout=2)
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        while not os.path.exists(self.socket_path):
+            time.sleep(0.05)
+
+    def tearDown(self):
+        self.thread.join()
+        self.tmpdir.cleanup()
+
+    def test_response_matches_wrapper(self):
+        argv = ["--format", "json"] + TEMPLATES
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            exit_code = cfnlint_exit_code_wrapper.wrapped_main(
+                argv, in_process=True
+            )
+        response = lint_server.request(self.socket_path, argv, start=False)
+        self.assertEqual(out.getvalue(), response["stdout"])
+        self.assertEqual(exit_code, response["exit_code"])
+
+    def test_no_server(self):
+        self.assertIsNone(
+            lint_server.request(
+                os.path.join(self.tmpdir.name, "missing.sock"), [], start=False
+            )
+        )
+
+    def test_other_rules_are_linted_by_the_client(self):
+        rules_dir = os.path.join(self.tmpdir.name, "rules")
+        os.mkdir(rules_dir)
+        with open(os.path.join(rules_dir, "everything.py"), "w") as f:
+            f.write(EXTRA_RULE)
+        argv = [TEMPLATES[0], "-a", rules_dir]
+        response = lint_server.request(self.socket_path, argv, start=False)
+        self.assertEqual({"fallback": True}, response)
+        client = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from cfn_mp_ql_rules.lint_server import client_main\n"
+                "client_main()",
+                "--socket",
+                self.socket_path,
+                "--no-start",
+            ]
+            + argv,
+            capture_output=True,
+            text=True,
+        )
+        self.assertIn("E9999 everything", client.stdout)
+
+    def test_include_experimental(self):
+        # reconfigured per request from the rules the server has loaded
+        for argv in [[EXPERIMENTAL], [EXPERIMENTAL, "--include-experimental"]]:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                exit_code = cfnlint_exit_code_wrapper.wrapped_main(
+                    argv, in_process=True
+                )
+            response = lint_server.request(self.socket_path, argv, start=False)
+            self.assertEqual(out.getvalue(), response["stdout"])
+            self.assertEqual(exit_code, response["exit_code"])
+        self.assertIn("WIAMPolicyNotElementBreadth", response["stdout"])
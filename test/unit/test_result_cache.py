@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from cfn_mp_ql_rules.result_cache import ResultCache, file_digest
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.tmpdir.name, "cache"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        key = self.cache.key("template.yaml", "digest", ["us-east-1"])
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"matches": [{"rule": "E9007"}]})
+        self.assertEqual(
+            {"matches": [{"rule": "E9007"}]}, self.cache.get(key)
+        )
+        self.assertEqual(
+            {"hits": 1, "misses": 1, "stores": 1, "evictions": 0},
+            {k: v for k, v in self.cache.stats().items() if k != "hit_rate"},
+        )
+
+    def test_key_depends_on_every_part(self):
+        self.assertNotEqual(
+            self.cache.key("a", ["us-east-1"]),
+            self.cache.key("a", ["us-west-2"]),
+        )
+
+    def test_changed_dependency_is_a_miss(self):
+        child = os.path.join(self.tmpdir.name, "child.yaml")
+        with open(child, "w") as f:
+            f.write("Resources: {}\n")
+        self.cache.put(
+            "k", {"matches": [], "dependencies": [[child, file_digest(child)]]}
+        )
+        self.assertIsNotNone(self.cache.get("k"))
+        with open(child, "w") as f:
+            f.write("Resources: {Changed: {}}\n")
+        self.assertIsNone(self.cache.get("k"))
+
+    def test_lru_eviction(self):
+        self.cache.max_size = 150
+        for i, key in enumerate(["old", "used", "new"]):
+            self.cache.put(key, {"matches": ["x" * 40]})
+            os.utime(self.cache._path(key), (i, i))
+            if key == "used":
+                self.cache.get("old")
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get("old"))
+        self.assertIsNone(self.cache.get("used"))
+        self.assertIsNotNone(self.cache.get("new"))
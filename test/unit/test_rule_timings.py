@@ -0,0 +1,68 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from cfn_mp_ql_rules import cfnlint_exit_code_wrapper
+from cfn_mp_ql_rules.rule_timings import RuleTimings
+
+RULE_LOCATION = os.path.dirname(
+    os.path.abspath(cfnlint_exit_code_wrapper.__file__)
+)
+TEMPLATES = [
+    "test/fixtures/templates/E9007/E9007.1.template.yaml",
+    "test/fixtures/templates/bad/resources/smit_test/EIAMNoInlinePolicy.yml",
+]
+
+
+class FakeRule:
+    id = "W0000"
+
+    def match(self, cfn):
+        return [bytearray(1024 * 1024), "second match"]
+
+    def determine_changes(self, cfn):
+        return [m for m in self.match(cfn) if isinstance(m, str)]
+
+
+class TestRuleTimings(unittest.TestCase):
+    def test_nested_methods(self):
+        rule = FakeRule()
+        timings = RuleTimings(os.path.dirname(os.path.abspath(__file__)))
+        timings.instrument(SimpleNamespace(all_rules={rule.id: rule}))
+        rule.determine_changes(SimpleNamespace(filename="t.yaml"))
+        timings.uninstrument()
+        self.assertNotIn("match", vars(rule))
+
+        stats = timings.templates["t.yaml"]["W0000"]
+        self.assertEqual(2, stats["match"]["matches"])
+        self.assertEqual(1, stats["determine_changes"]["matches"])
+        self.assertGreaterEqual(stats["match"]["peak_alloc"], 1024 * 1024)
+        self.assertGreaterEqual(
+            stats["determine_changes"]["peak_alloc"], 1024 * 1024
+        )
+        self.assertEqual(stats, timings.rule_totals()["W0000"])
+
+    def test_wrapper_report(self):
+        argv = [f"-a={RULE_LOCATION}", "--format", "json"] + TEMPLATES
+
+        def run(rule_timings=None):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                ec = cfnlint_exit_code_wrapper.run(
+                    argv, RULE_LOCATION, rule_timings=rule_timings
+                )
+            return ec, out.getvalue()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            report_path = os.path.join(tmpdir, "timings.json")
+            self.assertEqual(run(), run(report_path))
+            with open(report_path) as f:
+                report = json.load(f)
+        self.assertEqual(TEMPLATES, list(report["templates"]))
+        self.assertEqual(
+            2, report["rules"]["EIAMPolicyActionWildcard"]["match"]["calls"]
+        )
+        self.assertIn("expand_action", report["caches"])
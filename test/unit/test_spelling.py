@@ -0,0 +1,213 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import cfnlint.template
+from cfn_mp_ql_rules import spelling
+from cfn_mp_ql_rules.SentenceCase import Base
+
+
+def _template(metadata):
+    metadata = dict(metadata, QuickStartDocumentation=True)
+    return {
+        "Metadata": metadata,
+        "Parameters": {
+            "Bucket": {"Type": "String", "Description": "The zorbl bucket."}
+        },
+    }
+
+
+def _lint(template):
+    cfn = cfnlint.template.Template("test.json", template)
+    return [str(m.message) for m in Base().match(cfn)]
+
+
+def setUpModule():
+    global CACHE_HOME
+    CACHE_HOME = tempfile.TemporaryDirectory()
+    patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": CACHE_HOME.name})
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+    unittest.addModuleCleanup(CACHE_HOME.cleanup)
+    spelling.verdicts.cache_clear()
+    unittest.addModuleCleanup(spelling.verdicts.cache_clear)
+
+
+class CountingSpellChecker:
+    def __init__(self):
+        self.unknown_calls = []
+        self.correction_calls = []
+
+    def unknown(self, words):
+        self.unknown_calls.append(sorted(words))
+        return {w for w in words if w.startswith("zz")}
+
+    def correction(self, word):
+        self.correction_calls.append(word)
+        return word[2:]
+
+
+class TestSpelling(unittest.TestCase):
+    def test_rule_imports_without_loading_dictionaries(self):
+        code = (
+            "import sys\n"
+            "import cfn_mp_ql_rules.SentenceCase\n"
+            "from cfn_mp_ql_rules import spelling\n"
+            "assert 'spellchecker' not in sys.modules\n"
+            "assert spelling.custom_dict.cache_info().currsize == 0\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_custom_dict_is_shared(self):
+        self.assertIs(spelling.custom_dict(), spelling.custom_dict())
+        self.assertIs(spelling.custom_dict(), spelling.proper_nouns([]))
+        self.assertEqual(
+            spelling.read_custom_dict(), set(spelling.custom_dict())
+        )
+
+    def test_exclusions_do_not_leak_between_templates(self):
+        before = spelling.custom_dict()
+        self.assertIn("Zorbl", spelling.proper_nouns(["Zorbl"]))
+        self.assertNotIn("Zorbl", spelling.custom_dict())
+        self.assertIs(before, spelling.custom_dict())
+
+        excluded = _lint(_template({"LintSpellExclude": ["zorbl"]}))
+        self.assertFalse([m for m in excluded if "spelling" in m])
+        flagged = _lint(_template({}))
+        self.assertTrue([m for m in flagged if "zorbl" in m])
+
+    def test_spell_checker_is_loaded_once(self):
+        _lint(_template({}))
+        _lint(_template({}))
+        self.assertEqual(1, spelling.spell_checker.cache_info().misses)
+
+
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "spelling.json")
+        self.spell = CountingSpellChecker()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def cache(self, version="v1"):
+        return spelling.VerdictCache(self.path, version, lambda: self.spell)
+
+    def test_matches_spell_checker(self):
+        words = ["Bucket", "subnet", "acls", "Zorbl", "qwertyuiop", "a"]
+        expected = spelling.spell_checker().unknown(words)
+        cache = spelling.VerdictCache(self.path, "v1")
+        self.assertEqual(expected, cache.unknown(words))
+        cache.save()
+        warm = spelling.VerdictCache(self.path, "v1")
+        self.assertEqual(expected, warm.unknown(words))
+
+    def test_warm_cache_skips_lookups(self):
+        cache = self.cache()
+        self.assertEqual({"zzbucket"}, cache.unknown(["Bucket", "ZZBucket"]))
+        self.assertEqual({"zzbucket"}, cache.unknown(["bucket", "zzbucket"]))
+        self.assertEqual([["bucket", "zzbucket"]], self.spell.unknown_calls)
+        cache.save()
+
+        warm = self.cache()
+        self.assertEqual({"zzbucket"}, warm.unknown(["Bucket", "ZZBucket"]))
+        self.assertEqual(1, len(self.spell.unknown_calls))
+        self.assertEqual((2, 0), (warm.hits, warm.misses))
+
+    def test_suggestions_are_cached_when_asked_for(self):
+        cache = self.cache()
+        cache.unknown(["zzsubnet"])
+        self.assertEqual([], self.spell.correction_calls)
+        self.assertEqual("subnet", cache.suggestion("ZZSubnet"))
+        self.assertIsNone(cache.suggestion("subnet"))
+        cache.save()
+        self.assertEqual("subnet", self.cache().suggestion("zzsubnet"))
+        self.assertEqual(["zzsubnet"], self.spell.correction_calls)
+
+    def test_other_version_is_ignored(self):
+        cache = self.cache()
+        cache.unknown(["bucket"])
+        cache.save()
+        self.cache("v2").unknown(["bucket"])
+        self.assertEqual(2, len(self.spell.unknown_calls))
+
+    def test_save_merges_concurrent_writers(self):
+        first, second = self.cache(), self.cache()
+        first.unknown(["bucket"])
+        second.unknown(["subnet"])
+        first.save()
+        second.save()
+        with open(self.path) as f:
+            self.assertEqual(
+                {"bucket", "subnet"}, set(json.load(f)["words"])
+            )
+        self.assertEqual(["spelling.json"], os.listdir(self.tmpdir.name))
+
+    def test_save_keeps_the_newest_words(self):
+        cache = spelling.VerdictCache(
+            self.path, "v1", lambda: self.spell, max_size=2
+        )
+        for word in ["acl", "bucket", "subnet"]:
+            cache.unknown([word])
+            cache.save()
+        with open(self.path) as f:
+            self.assertEqual(["bucket", "subnet"], list(json.load(f)["words"]))
+
+    def test_without_path_nothing_is_written(self):
+        cache = spelling.VerdictCache(None, "v1", lambda: self.spell)
+        cache.unknown(["bucket"])
+        cache.save()
+        cache.unknown(["bucket"])
+        self.assertEqual(1, len(self.spell.unknown_calls))
+        self.assertEqual([], os.listdir(self.tmpdir.name))
+
+    def test_unwritable_cache_keeps_verdicts_in_memory(self):
+        path = os.path.join(self.tmpdir.name, "file", "spelling.json")
+        open(os.path.join(self.tmpdir.name, "file"), "w").close()
+        cache = spelling.VerdictCache(path, "v1", lambda: self.spell)
+        cache.unknown(["bucket"])
+        cache.save()
+        cache.unknown(["bucket"])
+        self.assertEqual(1, len(self.spell.unknown_calls))
+
+
+class TestVerdictCacheSettings(unittest.TestCase):
+    def setUp(self):
+        spelling.verdicts.cache_clear()
+        spelling.dictionary_version.cache_clear()
+        self.addCleanup(spelling.verdicts.cache_clear)
+        self.addCleanup(spelling.dictionary_version.cache_clear)
+
+    def test_off_by_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop(spelling.VERDICT_CACHE_ENV, None)
+            self.assertIsNone(spelling.verdicts().path)
+
+    def test_opt_in(self):
+        with mock.patch.dict(os.environ, {spelling.VERDICT_CACHE_ENV: "1"}):
+            path = spelling.verdicts().path
+        self.assertTrue(path.startswith(CACHE_HOME.name))
+
+    def test_symspell_version_covers_custom_dict(self):
+        versions = {}
+        for backend in spelling.BACKENDS:
+            for digest in ["a", "b"]:
+                spelling.dictionary_version.cache_clear()
+                with mock.patch.dict(
+                    os.environ, {spelling.BACKEND_ENV: backend}
+                ), mock.patch.object(
+                    spelling,
+                    "file_digest",
+                    lambda path: digest
+                    if path == spelling.CUSTOM_DICT_FILE
+                    else "dictionary",
+                ):
+                    versions[backend, digest] = spelling.dictionary_version()
+        self.assertEqual(
+            versions["pyspellchecker", "a"], versions["pyspellchecker", "b"]
+        )
+        self.assertNotEqual(versions["symspell", "a"], versions["symspell", "b"])
@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from spellchecker import SpellChecker
+from cfn_mp_ql_rules import spelling, spelling_index
+
+DIGEST = "ab" * 32
+WORDS = {
+    "bucket": 500,
+    "buckets": 200,
+    "subnet": 300,
+    "subnets": 100,
+    "instance": 900,
+    "instances": 400,
+    "distance": 700,
+    "abc": 6,
+    "ca": 5,
+    "the": 10000,
+    "then": 3000,
+    "than": 2000,
+}
+MISSPELLINGS = [
+    "bucekt",
+    "bukcets",
+    "subent",
+    "sbnet",
+    "instnace",
+    "instancse",
+    "intsance",
+    "distnace",
+    "ca",
+    "ac",
+    "bca",
+    "teh",
+    "thn",
+    "xyzzy",
+    "12",
+    "nan",
+    "Bucket",
+]
+
+
+def _spell_checker():
+    spell = SpellChecker(language=None)
+    spell.word_frequency.load_json(WORDS)
+    return spell
+
+
+class TestSpellingIndex(unittest.TestCase):
+    def setUp(self):
+        self.spell = _spell_checker()
+        self.index = spelling_index.SpellingIndex(
+            spelling_index.build_index(DIGEST, WORDS, ["Zorbl", "subnet"])
+        )
+
+    def test_header(self):
+        self.assertEqual(DIGEST, self.index.digest)
+        self.assertEqual(len(WORDS) + 1, self.index.count)
+        self.assertEqual(len("instances"), self.index.longest_word_length)
+
+    def test_matches_spell_checker(self):
+        self.assertEqual(
+            self.spell.unknown(MISSPELLINGS), self.index.unknown(MISSPELLINGS)
+        )
+        for word in MISSPELLINGS:
+            with self.subTest(word=word):
+                self.assertEqual(
+                    self.spell.candidates(word), self.index.candidates(word)
+                )
+                self.assertEqual(
+                    self.spell.correction(word), self.index.correction(word)
+                )
+
+    def test_custom_words_are_suggested_but_not_known(self):
+        self.assertEqual({"zorbl"}, self.index.unknown(["Zorbl"]))
+        self.assertEqual(0, self.index.frequency("zorbl"))
+        self.assertEqual(300, self.index.frequency("subnet"))
+        self.assertEqual("zorbl", self.index.correction("zorbal"))
+        self.assertIsNone(self.index.correction("zorbl"))
+
+    def test_distance(self):
+        for a, b, expected in [
+            ("bucket", "bucket", 0),
+            ("bucket", "bucekt", 1),
+            ("bucket", "buckets", 1),
+            ("ca", "abc", 2),
+            ("abcd", "badc", 2),
+            ("instance", "distance", 2),
+            ("subnet", "instance", 3),
+        ]:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(expected, spelling_index.distance(a, b, 2))
+
+    def test_rejects_other_buffers(self):
+        with self.assertRaises(spelling_index.SpellingIndexError):
+            spelling_index.SpellingIndex(b"CFNMPIAM" + bytes(100))
+
+
+class TestSpellingBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        for cached in [spelling.index, spelling.dictionary_version]:
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+
+    def test_backend_is_chosen_by_environment(self):
+        environ = {spelling.BACKEND_ENV: "pyspellchecker"}
+        with mock.patch.dict(os.environ, environ):
+            self.assertIs(spelling.spell_checker(), spelling.backend())
+            pyspellchecker_version = spelling.dictionary_version()
+        spelling.dictionary_version.cache_clear()
+        with mock.patch.dict(os.environ, {spelling.BACKEND_ENV: "symspell"}):
+            self.assertNotEqual(
+                pyspellchecker_version, spelling.dictionary_version()
+            )
+        with mock.patch.dict(os.environ, {spelling.BACKEND_ENV: "aspell"}):
+            with self.assertRaises(ValueError):
+                spelling.backend()
+
+    def test_index_is_built_once_into_the_cache(self):
+        environ = {
+            spelling.BACKEND_ENV: "symspell",
+            "XDG_CACHE_HOME": self.tmpdir.name,
+        }
+        built = spelling_index.build_index(DIGEST, WORDS)
+        with mock.patch.dict(os.environ, environ), mock.patch.object(
+            spelling, "PACKAGED_INDEX", os.path.join(self.tmpdir.name, "none")
+        ), mock.patch.object(spelling, "index_digest", lambda: DIGEST):
+            with mock.patch.object(
+                spelling, "build_index", return_value=built
+            ) as build:
+                index = spelling.backend()
+                spelling.index.cache_clear()
+                self.assertEqual(DIGEST, spelling.backend().digest)
+            self.assertEqual(1, build.call_count)
+        self.assertEqual({"bucekt"}, index.unknown(["bucket", "bucekt"]))
+        self.assertEqual(
+            [f"spelling_index-{DIGEST[:16]}.bin"],
+            os.listdir(os.path.join(self.tmpdir.name, "cfn-mp-ql-rules")),
+        )
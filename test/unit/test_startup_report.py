@@ -0,0 +1,21 @@
+import unittest
+from cfn_mp_ql_rules.startup_report import parse_importtime
+
+OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       263 |        263 |       policyuniverse.action_categories
+import time:    104505 |     105841 |     policyuniverse
+Some other stderr line
+import time:      2562 |      47154 | cfn_mp_ql_rules.iam_data
+"""
+
+
+class TestStartupReport(unittest.TestCase):
+    def test_parse_importtime(self):
+        self.assertEqual(
+            [
+                ("policyuniverse.action_categories", 263, 263, 3),
+                ("policyuniverse", 104505, 105841, 2),
+                ("cfn_mp_ql_rules.iam_data", 2562, 47154, 0),
+            ],
+            parse_importtime(OUTPUT),
+        )